@@ -0,0 +1,71 @@
+import bisect
+import json
+import os
+from datetime import date, timedelta
+from functools import lru_cache
+
+ACADEMIC_CALENDAR_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'academic_calendar.json')
+
+
+class HolidayIndex:
+    """Dates on which no classes are held, loaded once from a local data file.
+
+    Holidays are listed by date in the file. Exam weeks are given as week
+    numbers counted from the week the semester starts in, so they follow
+    whatever startDate the student picked.
+    """
+
+    def __init__(self, path=ACADEMIC_CALENDAR_PATH):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        holidays = sorted((date.fromisoformat(holiday['date']), holiday['name']) for holiday in data['holidays'])
+        self.dates = [day for day, _ in holidays]
+        self.names = [name for _, name in holidays]
+        self.exam_weeks = data.get('examWeeks', {})
+
+    def holidays_between(self, start, end):
+        first = bisect.bisect_left(self.dates, start)
+        last = bisect.bisect_right(self.dates, end)
+        return list(zip(self.dates[first:last], self.names[first:last]))
+
+    def exam_weeks_for(self, start):
+        """(name, monday) of each exam week for a semester starting on `start`."""
+        week_start = start - timedelta(days=start.weekday())
+        return [
+            (name, week_start + timedelta(weeks=week - 1))
+            for name, week in sorted(self.exam_weeks.items(), key=lambda item: item[1])
+        ]
+
+    def exam_days(self, start, end):
+        days = []
+        for name, monday in self.exam_weeks_for(start):
+            for offset in range(7):
+                day = monday + timedelta(days=offset)
+                if start <= day <= end:
+                    days.append((day, f'{name.capitalize()} exam week'))
+        return days
+
+    def excluded_dates(self, start, end, include_exam_weeks=True):
+        """Sorted (date, reason) pairs with no regular classes between start and end."""
+        excluded = dict(self.exam_days(start, end)) if include_exam_weeks else {}
+        # A holiday inside an exam week is still reported as the holiday
+        excluded.update(self.holidays_between(start, end))
+        return sorted(excluded.items())
+
+
+_index = None
+
+
+def get_holiday_index():
+    global _index
+    if _index is None:
+        _index = HolidayIndex()
+    return _index
+
+
+@lru_cache(maxsize=64)
+def semester_exclusions(start_date, end_date, include_exam_weeks=True):
+    """Excluded dates for a semester window, computed once per (start, end)."""
+    return tuple(get_holiday_index().excluded_dates(
+        date.fromisoformat(start_date), date.fromisoformat(end_date), include_exam_weeks
+    ))
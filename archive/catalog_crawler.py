@@ -0,0 +1,243 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from typing import Iterator, Optional
+
+from bs4 import BeautifulSoup
+
+from selcrs_helper import Course, Location, SectionTime, SelcrsHelper, TimeCodeConfig
+
+
+class CatalogPageError(RuntimeError):
+    """selcrs answered a catalog page with a timeout or maintenance page."""
+
+
+class CatalogStore:
+    """SQLite store for crawled catalog pages and the courses parsed from them."""
+
+    def __init__(self, path: str = 'catalog.db'):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS pages (
+                semester TEXT NOT NULL,
+                page INTEGER NOT NULL,
+                content_hash TEXT NOT NULL,
+                crawled_at REAL NOT NULL,
+                PRIMARY KEY (semester, page)
+            );
+            CREATE TABLE IF NOT EXISTS courses (
+                semester TEXT NOT NULL,
+                page INTEGER NOT NULL,
+                position INTEGER NOT NULL,
+                code TEXT NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (semester, page, position)
+            );
+            CREATE TABLE IF NOT EXISTS progress (
+                semester TEXT PRIMARY KEY,
+                next_page INTEGER NOT NULL,
+                complete INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                semester TEXT PRIMARY KEY,
+                time_codes TEXT NOT NULL
+            );
+        ''')
+
+    def page_hash(self, semester: str, page: int) -> Optional[str]:
+        row = self.conn.execute(
+            'SELECT content_hash FROM pages WHERE semester = ? AND page = ?',
+            (semester, page)
+        ).fetchone()
+        return row[0] if row else None
+
+    def save_page(self, semester: str, page: int, content_hash: str, courses):
+        with self.conn:
+            self.conn.execute('DELETE FROM courses WHERE semester = ? AND page = ?', (semester, page))
+            self.conn.executemany(
+                'INSERT INTO courses (semester, page, position, code, data) VALUES (?, ?, ?, ?, ?)',
+                [
+                    (semester, page, position, course.code, json.dumps(asdict(course), ensure_ascii=False))
+                    for position, course in enumerate(courses)
+                ]
+            )
+            self.conn.execute(
+                'INSERT OR REPLACE INTO pages (semester, page, content_hash, crawled_at) VALUES (?, ?, ?, ?)',
+                (semester, page, content_hash, time.time())
+            )
+
+    def truncate(self, semester: str, last_page: int):
+        # Drop pages past the end of the catalog (it shrank since the last crawl)
+        with self.conn:
+            self.conn.execute('DELETE FROM courses WHERE semester = ? AND page > ?', (semester, last_page))
+            self.conn.execute('DELETE FROM pages WHERE semester = ? AND page > ?', (semester, last_page))
+
+    def get_progress(self, semester: str):
+        row = self.conn.execute(
+            'SELECT next_page, complete FROM progress WHERE semester = ?', (semester,)
+        ).fetchone()
+        return (row[0], bool(row[1])) if row else (1, False)
+
+    def set_progress(self, semester: str, next_page: int, complete: bool = False):
+        with self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO progress (semester, next_page, complete) VALUES (?, ?, ?)',
+                (semester, next_page, int(complete))
+            )
+
+    def set_time_codes(self, semester: str, time_codes):
+        with self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO meta (semester, time_codes) VALUES (?, ?)',
+                (semester, json.dumps(list(time_codes)))
+            )
+
+    def get_time_codes(self, semester: str):
+        row = self.conn.execute('SELECT time_codes FROM meta WHERE semester = ?', (semester,)).fetchone()
+        return json.loads(row[0]) if row else []
+
+    def iter_courses(self, semester: str) -> Iterator[Course]:
+        rows = self.conn.execute(
+            'SELECT data FROM courses WHERE semester = ? ORDER BY page, position', (semester,)
+        )
+        for (data,) in rows:
+            yield course_from_dict(json.loads(data))
+
+    def close(self):
+        self.conn.close()
+
+
+def course_from_dict(data: dict) -> Course:
+    return Course(
+        code=data['code'],
+        class_name=data['class_name'],
+        title=data['title'],
+        units=data['units'],
+        required=data['required'],
+        location=Location(**data['location']),
+        instructors=list(data['instructors']),
+        times=[SectionTime(**time) for time in data['times']]
+    )
+
+
+class CatalogCrawler:
+    """Streams the full semester course catalog from selcrs.
+
+    Pages are fetched with at most `max_workers` requests in flight, parsed as
+    they arrive and yielded in page order. Pages whose content hash matches the
+    stored one are not re-parsed or re-written.
+    """
+
+    # Public course query; catalog rows share the layout of stu_slt_data.asp
+    CATALOG_PATH = '/menu1/dplycourse.asp'
+
+    def __init__(self, helper: Optional[SelcrsHelper] = None, store: Optional[CatalogStore] = None,
+                 max_workers: int = 4, max_pages: int = 1000):
+        self.helper = helper or SelcrsHelper.get_instance()
+        self.store = store or CatalogStore()
+        self.max_workers = max_workers
+        self.max_pages = max_pages
+        self.pages_fetched = 0
+        self.pages_changed = 0
+        self._local = threading.local()
+        self._session_generation = 0
+
+    def _session(self):
+        # requests.Session isn't documented as thread-safe; one per worker thread,
+        # carrying the helper's login cookies and rebuilt after a re-login
+        if getattr(self._local, 'generation', None) != self._session_generation:
+            session = self.helper.session_factory()
+            session.cookies.update(self.helper.session.cookies)
+            self._local.session = session
+            self._local.generation = self._session_generation
+        return self._local.session
+
+    def _fetch_page(self, semester: str, page: int) -> bytes:
+        resp = self._session().get(
+            f'{self.helper.selcrs_url}{self.CATALOG_PATH}',
+            params={'D0': semester, 'page': page}
+        )
+        resp.raise_for_status()
+        return resp.content
+
+    def _page_text(self, semester: str, page: int, content: bytes):
+        """(content, text) of a page, re-logging in once if selcrs answered with a timeout page."""
+        text = self.helper._decode_content(content)
+        if self.helper.COURSE_TIMEOUT_TEXT in text and self.helper.is_login and self.helper.can_re_login:
+            self.helper.re_login()
+            self._session_generation += 1
+            content = self._fetch_page(semester, page)
+            text = self.helper._decode_content(content)
+        if self.helper.COURSE_TIMEOUT_TEXT in text:
+            raise CatalogPageError(f'Page {page} of {semester} is a session timeout page')
+        self.helper.re_login_count = 0
+        return content, text
+
+    def _parse_page(self, text: str, time_code_config: Optional[TimeCodeConfig]):
+        """Courses on the page, or None if it has no course table at all."""
+        rows = BeautifulSoup(text, 'html.parser').find_all('tr')
+        if not rows:
+            return None
+        # Skip header row
+        courses = []
+        for tr in rows[1:]:
+            course = self.helper._parse_course_row(tr, time_code_config)
+            if course is not None:
+                courses.append(course)
+        return courses
+
+    def crawl(self, semester: str, time_code_config: Optional[TimeCodeConfig] = None,
+              resume: bool = True) -> Iterator[Course]:
+        """Yields the courses of every new or changed catalog page.
+
+        With `resume`, an interrupted crawl continues from the first page that
+        was not yet stored; a finished crawl starts over from page 1 and only
+        re-parses pages whose content changed. A timeout or maintenance page
+        raises CatalogPageError, leaving the stored catalog and progress as
+        they were so a later run resumes there.
+        """
+        next_page, complete = self.store.get_progress(semester)
+        page = next_page if resume and not complete else 1
+        if time_code_config:
+            self.store.set_time_codes(semester, [code.title for code in time_code_config.time_codes])
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = {}
+            next_to_submit = page
+            try:
+                while page <= self.max_pages:
+                    # Keep up to max_workers pages in flight ahead of the one being parsed
+                    while next_to_submit <= self.max_pages and len(pending) < self.max_workers:
+                        pending[next_to_submit] = executor.submit(self._fetch_page, semester, next_to_submit)
+                        next_to_submit += 1
+
+                    content = pending.pop(page).result()
+                    self.pages_fetched += 1
+                    content_hash = hashlib.sha256(content).hexdigest()
+
+                    if content_hash != self.store.page_hash(semester, page):
+                        content, text = self._page_text(semester, page, content)
+                        content_hash = hashlib.sha256(content).hexdigest()
+                        courses = self._parse_page(text, time_code_config)
+                        if courses is None:
+                            raise CatalogPageError(f'Page {page} of {semester} has no course table')
+                        if not courses:
+                            # An empty course table is past the last page
+                            break
+                        yield from courses
+                        self.store.save_page(semester, page, content_hash, courses)
+                        self.pages_changed += 1
+
+                    self.store.set_progress(semester, page + 1)
+                    page += 1
+            finally:
+                for future in pending.values():
+                    future.cancel()
+
+        self.store.truncate(semester, page - 1)
+        self.store.set_progress(semester, 1, complete=True)
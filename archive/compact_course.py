@@ -0,0 +1,148 @@
+import sys
+from array import array
+from dataclasses import dataclass
+from typing import List, Tuple
+
+from selcrs_helper import Course, CourseData, Location, SectionTime
+
+# Compact, slotted counterparts of the course dataclasses for holding large
+# numbers of courses in memory (a whole department's timetables, caches, ...).
+# Repeated strings are interned and section times are packed two bytes each:
+# high byte weekday, low byte time-code index (-1 is stored as 0xFF).
+
+
+def _intern(value: str) -> str:
+    return sys.intern(value) if value else value
+
+
+def pack_times(times: List[SectionTime]) -> array:
+    packed = array('H')
+    for time in times:
+        packed.append(((time.weekday & 0xFF) << 8) | (time.index & 0xFF))
+    return packed
+
+
+def unpack_times(packed: array) -> List[SectionTime]:
+    times = []
+    for value in packed:
+        index = value & 0xFF
+        times.append(SectionTime(weekday=value >> 8, index=index - 0x100 if index == 0xFF else index))
+    return times
+
+
+@dataclass(slots=True)
+class CompactCourse:
+    code: str
+    class_name: str
+    title: str
+    units: str
+    required: str
+    building: str
+    room: str
+    instructors: Tuple[str, ...]
+    times: array
+
+    @staticmethod
+    def from_course(course: Course) -> 'CompactCourse':
+        return CompactCourse(
+            code=course.code,
+            class_name=_intern(course.class_name),
+            title=course.title,
+            units=_intern(course.units),
+            required=_intern(course.required),
+            building=_intern(course.location.building),
+            room=_intern(course.location.room),
+            instructors=tuple(_intern(name) for name in course.instructors),
+            times=pack_times(course.times)
+        )
+
+    def to_course(self) -> Course:
+        return Course(
+            code=self.code,
+            class_name=self.class_name,
+            title=self.title,
+            units=self.units,
+            required=self.required,
+            location=Location(building=self.building, room=self.room),
+            instructors=list(self.instructors),
+            times=unpack_times(self.times)
+        )
+
+    def weekday_mask(self, weekday: int) -> int:
+        """Bitmask of the time-code indexes this course occupies on `weekday`."""
+        mask = 0
+        for value in self.times:
+            index = value & 0xFF
+            if value >> 8 == weekday and index != 0xFF:
+                mask |= 1 << index
+        return mask
+
+
+@dataclass(slots=True)
+class CompactCourseData:
+    courses: List[CompactCourse]
+    time_codes: Tuple[str, ...]
+
+    @staticmethod
+    def from_course_data(data: CourseData) -> 'CompactCourseData':
+        return CompactCourseData(
+            courses=[CompactCourse.from_course(course) for course in data.courses],
+            time_codes=tuple(_intern(code) for code in data.time_codes)
+        )
+
+    def to_course_data(self) -> CourseData:
+        return CourseData(
+            courses=[course.to_course() for course in self.courses],
+            time_codes=list(self.time_codes)
+        )
+
+
+def _measure(build) -> int:
+    import gc
+    import tracemalloc
+
+    gc.collect()
+    tracemalloc.start()
+    data = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del data
+    return size
+
+
+if __name__ == '__main__':
+    # Memory benchmark: a synthetic department of courses, regular vs compact.
+    import random
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    rooms = [f"{building}{number}" for building in ('CM', 'EC', 'SC', 'LA') for number in range(1001, 1041)]
+    instructors = [f"Instructor {i}" for i in range(300)]
+
+    # ''.join() builds a fresh string object each time, like text parsed out of HTML
+    def build_regular():
+        rng = random.Random(0)
+        return CourseData(
+            courses=[
+                Course(
+                    code=f"CSE{i:04d}",
+                    class_name=''.join(['資工系', ' ', '甲']),
+                    title=f"Course {i}",
+                    units='3',
+                    required=''.join(['必', '修']),
+                    location=Location(building='', room=''.join(rng.choice(rooms))),
+                    instructors=[''.join(rng.choice(instructors))],
+                    times=[SectionTime(weekday=rng.randint(1, 5), index=rng.randint(0, 10)) for _ in range(3)]
+                )
+                for i in range(count)
+            ],
+            time_codes=list('A1234B56789')
+        )
+
+    regular = build_regular()
+    assert CompactCourseData.from_course_data(regular).to_course_data() == regular
+
+    regular_size = _measure(build_regular)
+    compact_size = _measure(lambda: CompactCourseData.from_course_data(build_regular()))
+    print(f"{count} courses")
+    print(f"  dataclasses: {regular_size / 1024:10.1f} KiB")
+    print(f"  compact:     {compact_size / 1024:10.1f} KiB ({compact_size / regular_size:.0%})")
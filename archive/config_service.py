@@ -0,0 +1,164 @@
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from selcrs_helper import TimeCodeConfig
+
+DEFAULT_TIME_CODES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'time_codes.json')
+DEFAULT_SEMESTER_CODE = '1141'
+PREFERENCES_PATH = 'preferences.json'
+
+SEMESTER_SUFFIXES = {
+    '0': 'continuing_summer_education_program',
+    '1': 'fall_semester',
+    '2': 'spring_semester',
+    '3': 'summer_semester',
+}
+
+
+@lru_cache(maxsize=256)
+def semester_label(code: str, english: bool = False) -> str:
+    """'1141' -> '114course_year fall_semester' (or '2025~2026 fall_semester')."""
+    if len(code) != 4:
+        return code
+    last = SEMESTER_SUFFIXES.get(code[3], '')
+    if english:
+        year = int(code[:3]) + 1911
+        first = f"{year}~{year + 1}"
+    else:
+        first = f"{code[:3]}course_year"
+    return f"{first} {last}"
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """Parsed configuration plus lookup tables derived from it. Never mutated."""
+    time_code_config: TimeCodeConfig
+    default_semester_code: str
+    # period title -> (start, end), e.g. '1' -> ('08:10', '09:00')
+    period_times: Dict[str, Tuple[str, str]]
+    # period title -> index into time_code_config.time_codes
+    period_index: Dict[str, int]
+    source_hash: str
+
+    @staticmethod
+    def build(raw_time_code_config: str, default_semester_code: str) -> 'ConfigSnapshot':
+        time_code_config = TimeCodeConfig.from_raw_json(raw_time_code_config)
+        codes = time_code_config.time_codes
+        # index_of builds its index on first use, so the shared config is never
+        # written to afterwards; the lookup tables take the same (first) entry per title
+        period_index = {code.title: time_code_config.index_of(code.title) for code in codes}
+        return ConfigSnapshot(
+            time_code_config=time_code_config,
+            default_semester_code=default_semester_code,
+            period_times={title: (codes[i].start_time, codes[i].end_time) for title, i in period_index.items()},
+            period_index=period_index,
+            source_hash=_source_hash(raw_time_code_config, default_semester_code),
+        )
+
+    def semester_label(self, code: str, english: bool = False) -> str:
+        return semester_label(code, english)
+
+
+def _source_hash(raw_time_code_config: str, default_semester_code: str) -> str:
+    return hashlib.sha256(f'{default_semester_code}\0{raw_time_code_config}'.encode()).hexdigest()
+
+
+class ConfigService:
+    """Process-wide holder of the time-code and semester configuration.
+
+    The raw config is parsed once into a ConfigSnapshot that every request
+    shares read-only. When the source changes (new remote config values, or
+    the local time-code file is edited) a new snapshot is built and swapped
+    in with a single assignment, so readers never see a half-updated config.
+    """
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self, time_codes_path: str = DEFAULT_TIME_CODES_PATH):
+        self.time_codes_path = time_codes_path
+        self._snapshot: Optional[ConfigSnapshot] = None
+        self._file_mtime = None
+        self._lock = threading.Lock()
+
+    def get(self) -> ConfigSnapshot:
+        snapshot = self._snapshot
+        if snapshot is None or self._file_changed():
+            return self._load_file()
+        return snapshot
+
+    def update(self, raw_time_code_config: str, default_semester_code: str) -> ConfigSnapshot:
+        """Installs config fetched from remote; a no-op if nothing changed."""
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.source_hash == _source_hash(raw_time_code_config, default_semester_code):
+            return snapshot
+        new_snapshot = ConfigSnapshot.build(raw_time_code_config, default_semester_code)
+        with self._lock:
+            self._snapshot = new_snapshot
+            # Remote config takes over from the local file
+            self._file_mtime = None
+        return new_snapshot
+
+    def _file_changed(self) -> bool:
+        # Only watch the file while it is the source of the current snapshot
+        if self._file_mtime is None:
+            return False
+        try:
+            return os.path.getmtime(self.time_codes_path) != self._file_mtime
+        except OSError:
+            return False
+
+    def _load_file(self) -> ConfigSnapshot:
+        with self._lock:
+            mtime = os.path.getmtime(self.time_codes_path)
+            if self._snapshot is not None and self._file_mtime == mtime:
+                return self._snapshot
+            with open(self.time_codes_path, encoding='utf-8') as f:
+                raw = f.read()
+            default_semester_code = self._snapshot.default_semester_code if self._snapshot else DEFAULT_SEMESTER_CODE
+            self._snapshot = ConfigSnapshot.build(raw, default_semester_code)
+            self._file_mtime = mtime
+            return self._snapshot
+
+
+class Preferences:
+    """Small JSON-file key/value store for persisted settings."""
+
+    def __init__(self, path: str = PREFERENCES_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._values = None
+
+    def _load(self) -> Dict[str, str]:
+        if self._values is None:
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    self._values = json.load(f)
+            except (OSError, ValueError):
+                self._values = {}
+        return self._values
+
+    def get(self, key: str, default: str) -> str:
+        with self._lock:
+            return self._load().get(key, default)
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            values = self._load()
+            if values.get(key) == value:
+                return
+            values[key] = value
+            tmp_path = f'{self.path}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(values, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
@@ -3,6 +3,8 @@ from typing import Optional, List, Callable
 from enum import Enum
 import json
 
+from config_service import ConfigService, Preferences, semester_label
+
 class CourseState(Enum):
     LOADING = "loading"
     FINISH = "finish"
@@ -34,6 +36,8 @@ class CourseNotifyData:
         # Implementation would depend on your storage system
         pass
 
+_preferences = Preferences()
+
 class CoursePage:
     def __init__(self):
         self.state = CourseState.LOADING
@@ -46,30 +50,30 @@ class CoursePage:
         self.default_semester_code = ""
 
     def get_semester(self):
+        config = ConfigService.get_instance()
         try:
             # This would be your remote config implementation
             remote_config = self._get_remote_config()
-            self.default_semester_code = remote_config.get_string("default_course_semester_code")
+            default_semester_code = remote_config.get_string("default_course_semester_code")
             raw_time_code_config = remote_config.get_string("time_code_config")
-            time_code_config = TimeCodeConfig.from_raw_json(raw_time_code_config)
-            
+            # Parsed only when the remote values differ from the current snapshot
+            snapshot = config.update(raw_time_code_config, default_semester_code)
+
             # Save to preferences
-            self._save_preference("default_course_semester_code", self.default_semester_code)
+            self._save_preference("default_course_semester_code", default_semester_code)
             self._save_preference("time_code_config", raw_time_code_config)
-            
+
         except Exception:
-            # Fallback to stored preferences
-            self.default_semester_code = self._get_preference(
-                "default_course_semester_code",
-                f"{Constants.default_year}{Constants.default_semester}"
-            )
-            time_code_config = TimeCodeConfig.from_raw_json(
-                self._get_preference(
-                    "time_code_config",
-                    # Your default time code config JSON string
-                    '{"timeCodes":[...]}'
+            # Fallback to stored preferences, then to the bundled time codes
+            snapshot = config.get()
+            raw_time_code_config = self._get_preference("time_code_config", "")
+            if raw_time_code_config:
+                snapshot = config.update(
+                    raw_time_code_config,
+                    self._get_preference("default_course_semester_code", snapshot.default_semester_code)
                 )
-            )
+
+        self.default_semester_code = snapshot.default_semester_code
 
         default_semester = Semester(
             year=self.default_semester_code[:3],
@@ -88,27 +92,7 @@ class CoursePage:
         )
 
     def _parse_semester_text(self, text: str) -> str:
-        if len(text) == 4:
-            last_code = text[3]
-            last = ""
-            if last_code == "0":
-                last = "continuing_summer_education_program"
-            elif last_code == "1":
-                last = "fall_semester"
-            elif last_code == "2":
-                last = "spring_semester"
-            elif last_code == "3":
-                last = "summer_semester"
-
-            first = ""
-            if self._is_english_locale():
-                year = int(text[:3]) + 1911
-                first = f"{year}~{year + 1}"
-            else:
-                first = f"{text[:3]}course_year"
-
-            return f"{first} {last}"
-        return text
+        return semester_label(text, self._is_english_locale())
 
     def _on_semester_success(self, data: SemesterData):
         self.semester_data = data
@@ -170,12 +154,10 @@ class CoursePage:
         pass
 
     def _save_preference(self, key: str, value: str):
-        # Implementation would depend on your preferences system
-        pass
+        _preferences.set(key, value)
 
     def _get_preference(self, key: str, default: str) -> str:
-        # Implementation would depend on your preferences system
-        pass
+        return _preferences.get(key, default)
 
     def _is_english_locale(self) -> bool:
         # Implementation would depend on your locale system
@@ -186,8 +168,7 @@ class CoursePage:
         pass
 
     def _get_time_code_config(self):
-        # Implementation would depend on your time code config system
-        pass
+        return ConfigService.get_instance().get().time_code_config
 
     def _get_course_semester_data(self, default_semester: Semester, callback: GeneralCallback):
         # Implementation would depend on your course semester data system
@@ -0,0 +1,226 @@
+"""Record/replay layer for SelcrsHelper's HTTP session.
+
+SELCRS_FIXTURE_MODE picks the session SelcrsHelper uses:
+  (unset) / live  plain requests.Session, talks to selcrs
+  record          talks to selcrs and saves every response under SELCRS_FIXTURE_DIR
+  replay          answers from SELCRS_FIXTURE_DIR only, never touching the network
+
+Response bodies are stored gzipped under their sha256, so identical pages
+recorded by different runs are kept once. index.json maps each request
+(method, path, query and form fields, with credential fields replaced by a
+placeholder) to the responses it got, in order. Because credentials are not
+part of the key, a recording made with one account replays for any login.
+
+Recorded bodies are scrubbed too: every credential value sent through the
+store so far, by any of its sessions (the student id in particular, which pages echo back in any
+case, e.g. inside the e-mail address) is replaced wherever it appears, and
+the student id, name and e-mail cells of the user info page are blanked.
+
+Replay sleeps for the recorded response time unless SELCRS_FIXTURE_LATENCY
+gives a fixed number of seconds; set it to 0 for full speed.
+"""
+import gzip
+import hashlib
+import html
+import json
+import os
+import re
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+
+FIXTURE_DIR = os.getenv('SELCRS_FIXTURE_DIR', 'fixtures/selcrs')
+SCRUBBED = '<scrubbed>'
+# Form fields carrying the student id or password hash
+CREDENTIAL_FIELDS = {'SID', 'PASSWD', 'stuid', 'SPassword', 'Stuid'}
+# Response headers kept in fixtures; cookies never are
+KEPT_HEADERS = {'content-type', 'location'}
+# The user info page and its <td> cells holding the student id, name and e-mail
+USER_INFO_PATH = '/menu4/tools/changedat.asp'
+USER_INFO_CELLS = (5, 7, 9)
+# Escaped so a scrubbed cell still reads as text, not as an unknown tag
+SCRUBBED_HTML = html.escape(SCRUBBED).encode()
+TD_PATTERN = re.compile(rb'(<td\b[^>]*>)(.*?)(</td\s*>)', re.IGNORECASE | re.DOTALL)
+
+
+class FixtureMissing(requests.ConnectionError):
+    """Replay found no recorded response for a request."""
+
+
+def _request_key(method, url, params=None, data=None):
+    prepared = requests.Request(method.upper(), url, params=params, data=data).prepare()
+    parts = urlsplit(prepared.url)
+    query = sorted(parse_qsl(parts.query, keep_blank_values=True))
+    body = prepared.body or ''
+    if isinstance(body, bytes):
+        body = body.decode('latin1')
+    form = sorted(
+        (name, SCRUBBED if name in CREDENTIAL_FIELDS else value)
+        for name, value in parse_qsl(body, keep_blank_values=True)
+    )
+    return f'{prepared.method} {parts.path}?{urlencode(query)} {urlencode(form)}'
+
+
+def _credential_values(params, data):
+    values = set()
+    for fields in (params, data):
+        if isinstance(fields, dict):
+            values.update(str(value) for name, value in fields.items()
+                          if name in CREDENTIAL_FIELDS and len(str(value)) >= 4)
+    return values
+
+
+def _scrub_user_info(body):
+    cell = -1
+
+    def replace(match):
+        nonlocal cell
+        cell += 1
+        if cell in USER_INFO_CELLS:
+            return match.group(1) + SCRUBBED_HTML + match.group(3)
+        return match.group(0)
+
+    return TD_PATTERN.sub(replace, body)
+
+
+class FixtureStore:
+    def __init__(self, path=FIXTURE_DIR):
+        self.path = path
+        self._lock = threading.Lock()
+        self._index = None
+        # Shared by every session recording here, e.g. the crawler's per-thread
+        # sessions, which only copy the login cookies from the helper's session
+        self._scrub_values = set()
+
+    def add_scrub_values(self, values):
+        with self._lock:
+            self._scrub_values.update(values)
+
+    def scrub_values(self):
+        """Credential values to remove, longest first so a value containing another is replaced whole."""
+        with self._lock:
+            return sorted(self._scrub_values, key=len, reverse=True)
+
+    def _index_path(self):
+        return os.path.join(self.path, 'index.json')
+
+    def _body_path(self, digest):
+        return os.path.join(self.path, 'bodies', f'{digest}.gz')
+
+    def index(self):
+        if self._index is None:
+            try:
+                with open(self._index_path(), encoding='utf-8') as f:
+                    self._index = json.load(f)
+            except FileNotFoundError:
+                self._index = {}
+        return self._index
+
+    def add(self, key, status, headers, body, elapsed):
+        digest = hashlib.sha256(body).hexdigest()
+        with self._lock:
+            body_path = self._body_path(digest)
+            if not os.path.exists(body_path):
+                os.makedirs(os.path.dirname(body_path), exist_ok=True)
+                # mtime=0 keeps the gzip output, like the name, a function of the content
+                with open(body_path, 'wb') as f:
+                    f.write(gzip.compress(body, mtime=0))
+            self.index().setdefault(key, []).append({
+                'status': status,
+                'headers': headers,
+                'body': digest,
+                'elapsed': round(elapsed, 3),
+            })
+            tmp_path = f'{self._index_path()}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._index, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self._index_path())
+
+    def body(self, digest):
+        with open(self._body_path(digest), 'rb') as f:
+            return gzip.decompress(f.read())
+
+
+class RecordingSession(requests.Session):
+    """Live session that saves each response, with credentials scrubbed.
+
+    Credential values are remembered by the store, so pages fetched after
+    login, by this or any other session on the store, are scrubbed of the
+    student id as well.
+    """
+
+    def __init__(self, store=None):
+        super().__init__()
+        self.store = store or FixtureStore()
+
+    def _scrub(self, body, replacement=SCRUBBED_HTML):
+        for value in self.store.scrub_values():
+            pattern = re.escape(value.encode('latin1', errors='ignore'))
+            body = re.sub(pattern, replacement, body, flags=re.IGNORECASE)
+        return body
+
+    def request(self, method, url, params=None, data=None, **kwargs):
+        self.store.add_scrub_values(_credential_values(params, data))
+        started = time.perf_counter()
+        response = super().request(method, url, params=params, data=data, **kwargs)
+        elapsed = time.perf_counter() - started
+
+        body = response.content
+        if urlsplit(url).path.lower() == USER_INFO_PATH:
+            body = _scrub_user_info(body)
+        body = self._scrub(body)
+        headers = {
+            name: self._scrub(value.encode('latin1', errors='ignore'), SCRUBBED.encode()).decode('latin1')
+            for name, value in response.headers.items() if name.lower() in KEPT_HEADERS
+        }
+        self.store.add(_request_key(method, url, params, data), response.status_code, headers, body, elapsed)
+        return response
+
+
+class ReplaySession(requests.Session):
+    """Serves recorded responses; the nth identical request gets the nth recording."""
+
+    def __init__(self, store=None, latency=None):
+        super().__init__()
+        self.store = store or FixtureStore()
+        self.latency = latency
+        self._calls = {}
+
+    def request(self, method, url, params=None, data=None, **kwargs):
+        key = _request_key(method, url, params, data)
+        recordings = self.store.index().get(key)
+        if not recordings:
+            raise FixtureMissing(f'No fixture for {key}')
+        # Once a request has used up its recordings, the last one repeats
+        call = self._calls.get(key, 0)
+        self._calls[key] = call + 1
+        recording = recordings[min(call, len(recordings) - 1)]
+
+        delay = recording['elapsed'] if self.latency is None else self.latency
+        if delay:
+            time.sleep(delay)
+
+        response = requests.Response()
+        response.status_code = recording['status']
+        response.headers.update(recording['headers'])
+        response._content = self.store.body(recording['body'])
+        response.url = url
+        response.request = requests.Request(method.upper(), url, params=params, data=data).prepare()
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        return response
+
+
+def session_factory_from_env():
+    """Session factory for SelcrsHelper according to SELCRS_FIXTURE_MODE."""
+    mode = os.getenv('SELCRS_FIXTURE_MODE', 'live').lower()
+    if mode in ('', 'live'):
+        return requests.Session
+    store = FixtureStore(os.getenv('SELCRS_FIXTURE_DIR', FIXTURE_DIR))
+    if mode == 'record':
+        return lambda: RecordingSession(store)
+    if mode == 'replay':
+        latency = os.getenv('SELCRS_FIXTURE_LATENCY')
+        return lambda: ReplaySession(store, float(latency) if latency else None)
+    raise ValueError(f'Unknown SELCRS_FIXTURE_MODE: {mode}')
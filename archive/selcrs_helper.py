@@ -6,10 +6,12 @@ from typing import Optional, Dict, List, Any, Callable
 import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import chardet
 import time
 
+from http_fixtures import session_factory_from_env
+
 @dataclass
 class Location:
     building: str
@@ -49,6 +51,8 @@ class TimeCode:
 @dataclass
 class TimeCodeConfig:
     time_codes: List[TimeCode]
+    # title -> index, built on the first lookup
+    _index: Optional[Dict[str, int]] = field(default=None, init=False, repr=False, compare=False)
 
     @staticmethod
     def from_raw_json(json_str: str) -> 'TimeCodeConfig':
@@ -64,10 +68,12 @@ class TimeCodeConfig:
         return TimeCodeConfig(time_codes=time_codes)
 
     def index_of(self, section: str) -> int:
-        for i, code in enumerate(self.time_codes):
-            if code.title == section:
-                return i
-        return -1
+        if self._index is None:
+            index = {}
+            for i, code in enumerate(self.time_codes):
+                index.setdefault(code.title, i)
+            self._index = index
+        return self._index.get(section, -1)
 
 class GeneralResponse:
     def __init__(self, status_code: int = 200, message: str = "success"):
@@ -108,8 +114,10 @@ class SelcrsHelper:
             cls._instance = cls()
         return cls._instance
 
-    def __init__(self):
-        self.session = requests.Session()
+    def __init__(self, session_factory: Optional[Callable[[], requests.Session]] = None):
+        # Record/replay sessions for offline runs plug in here (see http_fixtures.py)
+        self.session_factory = session_factory or session_factory_from_env()
+        self.session = self.session_factory()
         self.username = ''
         self.password = ''
         self.is_login = False
@@ -135,7 +143,7 @@ class SelcrsHelper:
         self.index = 1
         self.error = 0
         self.is_login = False
-        self.session = requests.Session()
+        self.session = self.session_factory()
 
     @staticmethod
     def base64md5(password: str) -> str:
@@ -270,6 +278,69 @@ class SelcrsHelper:
             user_info.email = decode_field(raw_email)
         return user_info
 
+    @staticmethod
+    def _decode_content(content: bytes) -> str:
+        # Try to detect the encoding
+        detected = chardet.detect(content)
+        print("DEBUG: Detected encoding:", detected)
+        
+        # Try different encodings
+        encodings = ['big5', 'cp950', 'utf-8', 'gbk']
+        decoded_text = None
+        for encoding in encodings:
+            try:
+                decoded_text = content.decode(encoding)
+                if any('\u4e00' <= c <= '\u9fff' for c in decoded_text):  # Check if contains Chinese characters
+                    print(f"DEBUG: Successfully decoded with {encoding}")
+                    break
+            except UnicodeDecodeError:
+                continue
+        
+        if decoded_text is None:
+            decoded_text = content.decode('big5', errors='replace')
+        return decoded_text
+
+    @staticmethod
+    def _parse_course_row(tr, time_code_config: Optional[TimeCodeConfig] = None) -> Optional[Course]:
+        td_elements = tr.find_all("td")
+        if len(td_elements) < 10:
+            return None
+
+        # Get course title
+        title_element = td_elements[4].find("a")
+        if not title_element:
+            return None
+            
+        titles = title_element.get_text(strip=True).split('\n')
+        title = titles[0]  # Default to Chinese title
+        
+        # Get course details
+        course = Course(
+            code=td_elements[2].get_text(strip=True),
+            class_name=f"{td_elements[1].get_text(strip=True)} {td_elements[3].get_text(strip=True)}",
+            title=title,
+            units=td_elements[5].get_text(strip=True),
+            required=td_elements[7].get_text(strip=True) + "修" if len(td_elements[7].get_text(strip=True)) == 1 else td_elements[7].get_text(strip=True),
+            location=Location(
+                building="",
+                room=td_elements[9].get_text(strip=True)
+            ),
+            instructors=[td_elements[8].get_text(strip=True)],
+            times=[]
+        )
+        
+        # Get course times
+        for j in range(10, len(td_elements)):
+            time_text = td_elements[j].get_text(strip=True)
+            if time_text:
+                sections = list(time_text)
+                for section in sections:
+                    if section != ' ':
+                        index = time_code_config.index_of(section) if time_code_config else -1
+                        if index != -1:
+                            course.times.append(SectionTime(weekday=j-9, index=index))
+        return course
+
     def get_course_data(self, username: str, semester: str, time_code_config: Optional[TimeCodeConfig] = None) -> Optional[CourseData]:
         try:
             # The course data is available at /menu4/query/stu_slt_data.asp
@@ -285,24 +356,7 @@ class SelcrsHelper:
                 headers={'Content-Type': 'application/x-www-form-urlencoded'}
             )
             
-            # Try to detect the encoding
-            detected = chardet.detect(resp.content)
-            print("DEBUG: Detected encoding:", detected)
-            
-            # Try different encodings
-            encodings = ['big5', 'cp950', 'utf-8', 'gbk']
-            decoded_text = None
-            for encoding in encodings:
-                try:
-                    decoded_text = resp.content.decode(encoding)
-                    if any('\u4e00' <= c <= '\u9fff' for c in decoded_text):  # Check if contains Chinese characters
-                        print(f"DEBUG: Successfully decoded with {encoding}")
-                        break
-                except UnicodeDecodeError:
-                    continue
-            
-            if decoded_text is None:
-                decoded_text = resp.content.decode('big5', errors='replace')
+            decoded_text = self._decode_content(resp.content)
             
             if self.COURSE_TIMEOUT_TEXT in decoded_text and self.can_re_login:
                 print("DEBUG: Session timeout detected, attempting re-login")
@@ -329,45 +383,9 @@ class SelcrsHelper:
             
             # Skip header row
             for tr in tr_elements[1:]:
-                td_elements = tr.find_all("td")
-                if len(td_elements) < 10:
-                    continue
-
-                # Get course title
-                title_element = td_elements[4].find("a")
-                if not title_element:
-                    continue
-                    
-                titles = title_element.get_text(strip=True).split('\n')
-                title = titles[0]  # Default to Chinese title
-                
-                # Get course details
-                course = Course(
-                    code=td_elements[2].get_text(strip=True),
-                    class_name=f"{td_elements[1].get_text(strip=True)} {td_elements[3].get_text(strip=True)}",
-                    title=title,
-                    units=td_elements[5].get_text(strip=True),
-                    required=td_elements[7].get_text(strip=True) + "修" if len(td_elements[7].get_text(strip=True)) == 1 else td_elements[7].get_text(strip=True),
-                    location=Location(
-                        building="",
-                        room=td_elements[9].get_text(strip=True)
-                    ),
-                    instructors=[td_elements[8].get_text(strip=True)],
-                    times=[]
-                )
-                
-                # Get course times
-                for j in range(10, len(td_elements)):
-                    time_text = td_elements[j].get_text(strip=True)
-                    if time_text:
-                        sections = list(time_text)
-                        for section in sections:
-                            if section != ' ':
-                                index = time_code_config.index_of(section) if time_code_config else -1
-                                if index != -1:
-                                    course.times.append(SectionTime(weekday=j-9, index=index))
-                
-                course_data.courses.append(course)
+                course = self._parse_course_row(tr, time_code_config)
+                if course is not None:
+                    course_data.courses.append(course)
             
             end_time = time.time()
             print(f"Course parsing took {end_time - start_time:.2f} seconds")
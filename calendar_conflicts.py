@@ -0,0 +1,133 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from calendar_events import TAIPEI, TIME_ZONE
+from calendar_quota import MAX_RETRIES, execute, get_quota
+from occurrences import expand
+
+# Free/busy queries over long ranges are rejected, so the semester window is
+# split into chunks of this many days. All chunks go out in one batch request,
+# so the check costs one HTTP round trip (and ceil(days / 60) queries) however
+# many courses or weeks there are.
+FREEBUSY_CHUNK_DAYS = 60
+
+
+def _parse_time(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def _local(value):
+    # numpy datetime64 is naive, so compare everything as Taipei wall-clock time
+    return value.astimezone(TAIPEI).replace(tzinfo=None)
+
+
+def semester_window(start_date, end_date):
+    time_min = datetime.strptime(start_date, '%Y-%m-%d').replace(tzinfo=TAIPEI)
+    time_max = datetime.strptime(end_date, '%Y-%m-%d').replace(tzinfo=TAIPEI) + timedelta(days=1)
+    return time_min, time_max
+
+
+def query_busy(service, time_min, time_max, calendar_id='primary'):
+    """Busy blocks on `calendar_id` between time_min and time_max, sorted by start."""
+    chunks = []
+    chunk_start = time_min
+    while chunk_start < time_max:
+        chunk_end = min(chunk_start + timedelta(days=FREEBUSY_CHUNK_DAYS), time_max)
+        chunks.append((chunk_start, chunk_end))
+        chunk_start = chunk_end
+
+    for attempt in range(MAX_RETRIES + 1):
+        busy = []
+        errors = []
+
+        def collect(request_id, response, exception):
+            if exception is not None:
+                errors.append(exception)
+                return
+            calendar = response.get('calendars', {}).get(calendar_id, {})
+            if calendar.get('errors'):
+                errors.append(RuntimeError(f"Free/busy error: {calendar['errors']}"))
+            for block in calendar.get('busy', []):
+                busy.append((_parse_time(block['start']), _parse_time(block['end'])))
+
+        batch = service.new_batch_http_request(callback=collect)
+        for chunk_start, chunk_end in chunks:
+            batch.add(service.freebusy().query(body={
+                'timeMin': chunk_start.isoformat(),
+                'timeMax': chunk_end.isoformat(),
+                'timeZone': TIME_ZONE,
+                'items': [{'id': calendar_id}],
+            }))
+        execute(batch, cost=len(chunks))
+
+        if not errors:
+            break
+        # Rate-limited queries inside the batch: back off and resend the (small) batch
+        if attempt == MAX_RETRIES or get_quota().note_error(errors[0], attempt) is None:
+            raise errors[0]
+
+    busy.sort()
+    return busy
+
+
+def merge_busy(busy):
+    """Merges start-sorted busy blocks into disjoint local datetime64 arrays."""
+    merged = []
+    for start, end in busy:
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    starts = np.array([_local(start) for start, _ in merged], dtype='datetime64[s]')
+    ends = np.array([_local(end) for _, end in merged], dtype='datetime64[s]')
+    return starts, ends
+
+
+def find_overlaps(occurrences, busy_starts, busy_ends):
+    """Indexes of occurrences that overlap a busy block, and which block.
+
+    Busy blocks must be disjoint and sorted, so their ends are sorted too and
+    one searchsorted finds, for every class at once, the first block that
+    ends after the class starts; the class conflicts if that block also
+    starts before the class ends.
+    """
+    starts = occurrences.starts().astype('datetime64[s]')
+    ends = occurrences.ends().astype('datetime64[s]')
+    if len(busy_starts) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    block = np.searchsorted(busy_ends, starts, side='right')
+    candidate = np.minimum(block, len(busy_starts) - 1)
+    hit = (block < len(busy_starts)) & (busy_starts[candidate] < ends)
+    return np.flatnonzero(hit), block[hit]
+
+
+def check_conflicts(service, courses, start_date, end_date, calendar_id='primary', excluded_dates=()):
+    """Course occurrences that collide with existing commitments, grouped per course."""
+    occurrences = expand(courses, start_date, end_date, excluded_dates).sorted_by_start()
+    if not len(occurrences):
+        return []
+
+    time_min, time_max = semester_window(start_date, end_date)
+    busy_starts, busy_ends = merge_busy(query_busy(service, time_min, time_max, calendar_id))
+
+    conflicts = {}
+    rows, blocks = find_overlaps(occurrences, busy_starts, busy_ends)
+    starts = occurrences.starts()
+    ends = occurrences.ends()
+    for row, block in zip(rows.tolist(), blocks.tolist()):
+        course_index = int(occurrences.course[row])
+        course = courses[course_index]
+        entry = conflicts.setdefault(course_index, {
+            'courseId': course['added_at'],
+            'courseName': course['courseName'],
+            'occurrences': [],
+        })
+        entry['occurrences'].append({
+            'start': f'{starts[row]}:00+08:00',
+            'end': f'{ends[row]}:00+08:00',
+            'busyStart': f'{busy_starts[block]}+08:00',
+            'busyEnd': f'{busy_ends[block]}+08:00',
+        })
+    return [conflicts[i] for i in sorted(conflicts)]
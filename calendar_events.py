@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta, timezone
+
+from calendar_sync import app_event_properties
+
+TIME_ZONE = 'Asia/Taipei'
+# Taiwan has no DST, so a fixed offset is exact
+TAIPEI = timezone(timedelta(hours=8))
+
+# Map days to numbers (0 = Monday, 1 = Tuesday, etc.)
+DAY_MAPPING = {
+    'Monday': 0,
+    'Tuesday': 1,
+    'Wednesday': 2,
+    'Thursday': 3,
+    'Friday': 4
+}
+BYDAY = ["MO", "TU", "WE", "TH", "FR"]
+
+
+def course_time_span(course):
+    """Start and end ("HH:MM") from the first and last period of the course."""
+    start_time = course['timeRange'][0].split('~')[0].strip()
+    end_time = course['timeRange'][-1].split('~')[1].strip()
+    return start_time, end_time
+
+
+def first_class_date(course, start_date):
+    """First date on or after `start_date` that falls on the course's weekday."""
+    base_start_date = datetime.strptime(start_date, '%Y-%m-%d')
+    days_to_add = (DAY_MAPPING[course['day']] - base_start_date.weekday()) % 7
+    return base_start_date + timedelta(days=days_to_add)
+
+
+def exdate_line(course, excluded_dates):
+    """EXDATE rule dropping the course's classes that fall on excluded dates."""
+    start_time, _ = course_time_span(course)
+    course_day = DAY_MAPPING[course['day']]
+    stamps = [
+        f"{day.strftime('%Y%m%d')}T{start_time.replace(':', '')}00"
+        for day in excluded_dates if day.weekday() == course_day
+    ]
+    return f"EXDATE;TZID={TIME_ZONE}:{','.join(stamps)}" if stamps else None
+
+
+def weekly_description(course, start_date, topics):
+    """'Week 1 (2025/02/21): ...' lines dated from the course's first class."""
+    first = first_class_date(course, start_date)
+    return '\n'.join(
+        f"Week {week} ({(first + timedelta(weeks=week - 1)).strftime('%Y/%m/%d')}): {topic}"
+        for week, topic in topics
+    )
+
+
+def build_course_event(course, start_date, end_date, export_id=None, excluded_dates=(), reminders=None,
+                       topics=None):
+    """Recurring weekly Calendar event body for one course.
+
+    Classes on `excluded_dates` (holidays, exam weeks) are left out through
+    EXDATE, and `reminders` overrides are set, in the same insert instead of
+    patching each occurrence later. `topics` are the syllabus's (week, topic)
+    pairs, listed in the description.
+    """
+    start_time, end_time = course_time_span(course)
+    course_day = DAY_MAPPING[course['day']]
+    adjusted_start_date = first_class_date(course, start_date).strftime('%Y-%m-%d')
+
+    recurrence = [
+        f'RRULE:FREQ=WEEKLY;UNTIL={end_date.replace("-", "")}T235959Z;BYDAY={BYDAY[course_day]}'
+    ]
+    exdate = exdate_line(course, excluded_dates)
+    if exdate:
+        recurrence.append(exdate)
+
+    description = [f"Instructor: {course['instructor']}"] if course.get('instructor') else []
+    if topics:
+        description.append(weekly_description(course, start_date, topics))
+
+    event = {
+        'summary': course['courseName'],
+        'location': course['location'],
+        'description': '\n\n'.join(description),
+        'start': {
+            'dateTime': f"{adjusted_start_date}T{start_time}:00",
+            'timeZone': TIME_ZONE,
+        },
+        'end': {
+            'dateTime': f"{adjusted_start_date}T{end_time}:00",
+            'timeZone': TIME_ZONE,
+        },
+        'recurrence': recurrence,
+        'extendedProperties': app_event_properties(course['added_at'], export_id),
+    }
+    if reminders:
+        event['reminders'] = reminders
+    return event
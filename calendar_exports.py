@@ -0,0 +1,164 @@
+import json
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from calendar_events import build_course_event
+from calendar_quota import MAX_RETRIES, execute, get_quota
+from google_client import is_http_error
+
+EXPORT_LOG_PATH = 'exports.json'
+# Google recommends keeping batches at 50 calls or fewer
+DELETE_BATCH_SIZE = 50
+DELETE_WORKERS = 4
+
+
+def new_export_id():
+    return uuid.uuid4().hex
+
+
+class ExportLog:
+    """Remembers which event ids every export created, so it can be undone."""
+
+    def __init__(self, path=EXPORT_LOG_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path) as f:
+            return json.load(f)
+
+    def _write(self, data):
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def record(self, export_id, calendar_id, event_ids, **details):
+        with self._lock:
+            data = self._read()
+            export = data.setdefault(export_id, {
+                'calendarId': calendar_id,
+                'createdAt': datetime.now().isoformat(),
+                'eventIds': [],
+                **details,
+            })
+            export['eventIds'].extend(event_id for event_id in event_ids if event_id not in export['eventIds'])
+            self._write(data)
+
+    def get(self, export_id):
+        with self._lock:
+            return self._read().get(export_id)
+
+    def latest(self):
+        """Most recent export of the app's own account.
+
+        Batch exports carry a studentId and belong to other accounts, so
+        they are only ever undone by their export id.
+        """
+        with self._lock:
+            data = self._read()
+        own = [export_id for export_id, export in data.items() if 'studentId' not in export]
+        if not own:
+            return None
+        return max(own, key=lambda export_id: data[export_id]['createdAt'])
+
+    def forget(self, export_id, event_ids):
+        """Drops deleted event ids; the export goes away once none are left."""
+        with self._lock:
+            data = self._read()
+            export = data.get(export_id)
+            if export is None:
+                return
+            deleted = set(event_ids)
+            export['eventIds'] = [event_id for event_id in export['eventIds'] if event_id not in deleted]
+            if not export['eventIds']:
+                del data[export_id]
+            self._write(data)
+
+
+def insert_course_events(service, calendar_id, courses, start_date, end_date, export_id, created_ids,
+                         excluded_dates=(), reminders=None, user=None, syllabi=None):
+    """Inserts one recurring event per course, appending each new event id to `created_ids`.
+
+    Ids are appended as they are created, so a caller can still record (and
+    later undo) a partial export if an insert fails halfway. `syllabi` maps
+    course codes to weekly topics for the event descriptions.
+    """
+    syllabi = syllabi or {}
+    for course in courses:
+        event = build_course_event(course, start_date, end_date, export_id, excluded_dates, reminders,
+                                   syllabi.get(course.get('code')))
+        request = service.events().insert(calendarId=calendar_id, body=event)
+        created = execute(request, user)
+        created_ids.append(created['id'])
+
+
+def _delete_chunk(service_factory, calendar_id, event_ids):
+    # Each worker builds its own service: the underlying httplib2 connection
+    # isn't safe to share between threads.
+    service = service_factory()
+    deleted = []
+    failed = []
+    remaining = list(event_ids)
+
+    for attempt in range(MAX_RETRIES + 1):
+        rate_limited = []
+
+        def collect(request_id, response, exception):
+            if exception is None:
+                deleted.append(request_id)
+            # 404/410: already deleted (by the user or an earlier, partly failed undo)
+            elif is_http_error(exception) and exception.resp.status in (404, 410):
+                deleted.append(request_id)
+            elif get_quota().note_error(exception, attempt) is not None:
+                rate_limited.append(request_id)
+            else:
+                failed.append(request_id)
+
+        batch = service.new_batch_http_request(callback=collect)
+        for event_id in remaining:
+            batch.add(service.events().delete(calendarId=calendar_id, eventId=event_id), request_id=event_id)
+        execute(batch, cost=len(remaining))
+
+        remaining = rate_limited
+        if not remaining:
+            break
+
+    failed.extend(remaining)
+    return deleted, failed
+
+
+def delete_events(service_factory, calendar_id, event_ids,
+                  batch_size=DELETE_BATCH_SIZE, max_workers=DELETE_WORKERS):
+    """Deletes events in batched chunks running in parallel.
+
+    Returns (deleted, failed) event id lists. Events that no longer exist
+    count as deleted, so calling this again after a partial failure is safe.
+    """
+    chunks = [event_ids[i:i + batch_size] for i in range(0, len(event_ids), batch_size)]
+    deleted = []
+    failed = []
+    if not chunks:
+        return deleted, failed
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as executor:
+        results = executor.map(lambda chunk: _delete_chunk(service_factory, calendar_id, chunk), chunks)
+        for chunk_deleted, chunk_failed in results:
+            deleted.extend(chunk_deleted)
+            failed.extend(chunk_failed)
+    return deleted, failed
+
+
+def undo_export(service_factory, export_log, export_id):
+    """Removes every event an export created. Returns (deleted, failed) counts or None."""
+    export = export_log.get(export_id)
+    if export is None:
+        return None
+    deleted, failed = delete_events(service_factory, export['calendarId'], export['eventIds'])
+    export_log.forget(export_id, deleted)
+    return len(deleted), len(failed)
@@ -0,0 +1,203 @@
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+
+from google_client import is_http_error
+
+# Token buckets shared by every worker process through one SQLite file. Every
+# Calendar API call takes tokens from the project bucket and, if the caller
+# names a user, from that user's bucket as well. A rate-limit response
+# (429, or 403 rateLimitExceeded/userRateLimitExceeded) blocks the affected
+# bucket for all processes until Retry-After (or an exponential backoff) has
+# passed, so workers don't keep hammering the API while it is refusing them.
+
+QUOTA_DB_PATH = os.getenv('QUOTA_DB_PATH', 'quota.db')
+PROJECT_QPS = float(os.getenv('CALENDAR_PROJECT_QPS', '10'))
+USER_QPS = float(os.getenv('CALENDAR_USER_QPS', '5'))
+MAX_RETRIES = 5
+MAX_BACKOFF = 32
+RATE_LIMIT_REASONS = {'rateLimitExceeded', 'userRateLimitExceeded'}
+PROJECT_BUCKET = 'project'
+
+
+def _error_reason(error):
+    try:
+        details = json.loads(error.content.decode('utf-8'))['error']
+        return details['errors'][0]['reason']
+    except (ValueError, KeyError, IndexError, TypeError, AttributeError):
+        return None
+
+
+def is_rate_limit_error(error):
+    if not is_http_error(error):
+        return False
+    status = error.resp.status
+    return status == 429 or (status == 403 and _error_reason(error) in RATE_LIMIT_REASONS)
+
+
+def retry_delay(error, attempt):
+    """Seconds to wait before retrying: Retry-After if given, else backoff with jitter."""
+    retry_after = error.resp.get('retry-after') if is_http_error(error) else None
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    return min(2 ** attempt, MAX_BACKOFF) + random.random()
+
+
+class QuotaManager:
+    def __init__(self, path=QUOTA_DB_PATH, project_qps=PROJECT_QPS, user_qps=USER_QPS):
+        self.path = path
+        self.project_qps = project_qps
+        self.user_qps = user_qps
+        self._local = threading.local()
+
+    def _connection(self):
+        # One connection per thread: each acquire/block runs its own transaction,
+        # which can't be interleaved on a shared connection. Connections must not
+        # cross fork() either, so a child process reopens its own.
+        local = self._local
+        if getattr(local, 'conn', None) is None or local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS buckets (
+                    name TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated REAL NOT NULL,
+                    blocked_until REAL NOT NULL DEFAULT 0,
+                    acquired INTEGER NOT NULL DEFAULT 0,
+                    waited REAL NOT NULL DEFAULT 0,
+                    rate_limited INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+            local.conn = conn
+            local.pid = os.getpid()
+        return local.conn
+
+    def _rate(self, name):
+        return self.project_qps if name == PROJECT_BUCKET else self.user_qps
+
+    def _available(self, conn, name, cost, now):
+        """Refilled token count of a bucket and how long until `cost` fit in it."""
+        rate = self._rate(name)
+        # Burst capacity of one second's worth of calls (at least one batch)
+        capacity = max(rate, cost)
+        row = conn.execute(
+            'SELECT tokens, updated, blocked_until FROM buckets WHERE name = ?', (name,)
+        ).fetchone()
+        if row is None:
+            conn.execute('INSERT INTO buckets (name, tokens, updated) VALUES (?, ?, ?)', (name, capacity, now))
+            return capacity, 0
+
+        tokens, updated, blocked_until = row
+        if blocked_until > now:
+            return 0, blocked_until - now
+        tokens = min(capacity, tokens + (now - updated) * rate)
+        return tokens, 0 if tokens >= cost else (cost - tokens) / rate
+
+    def acquire(self, cost=1, user=None):
+        """Blocks until `cost` calls are allowed for the project (and `user`).
+
+        Returns the number of seconds spent waiting.
+        """
+        names = [PROJECT_BUCKET] + ([f'user:{user}'] if user else [])
+        conn = self._connection()
+        waited = 0.0
+        while True:
+            now = time.time()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                available = {name: self._available(conn, name, cost, now) for name in names}
+                wait = max(delay for _, delay in available.values())
+                if wait == 0:
+                    # Only take tokens once every bucket can cover the cost
+                    for name, (tokens, _) in available.items():
+                        conn.execute(
+                            'UPDATE buckets SET tokens = ?, updated = ?, acquired = acquired + ?, '
+                            'waited = waited + ? WHERE name = ?',
+                            (tokens - cost, now, cost, waited, name)
+                        )
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            if wait == 0:
+                return waited
+            time.sleep(wait)
+            waited += wait
+
+    def block(self, seconds, user=None):
+        """Pauses the bucket a rate-limit response was about, in every process."""
+        name = f'user:{user}' if user else PROJECT_BUCKET
+        until = time.time() + seconds
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(
+                'INSERT OR IGNORE INTO buckets (name, tokens, updated) VALUES (?, 0, ?)', (name, time.time())
+            )
+            conn.execute(
+                'UPDATE buckets SET blocked_until = MAX(blocked_until, ?), tokens = 0, '
+                'rate_limited = rate_limited + 1 WHERE name = ?',
+                (until, name)
+            )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def note_error(self, error, attempt=0, user=None):
+        """Blocks the right bucket for a rate-limit error. Returns the delay, or None."""
+        if not is_rate_limit_error(error):
+            return None
+        delay = retry_delay(error, attempt)
+        # userRateLimitExceeded only concerns that user; everything else is project-wide
+        self.block(delay, user if user and _error_reason(error) == 'userRateLimitExceeded' else None)
+        return delay
+
+    def execute(self, request, user=None, cost=1):
+        """Runs a googleapiclient request (or batch) under the shared quota."""
+        for attempt in range(MAX_RETRIES + 1):
+            self.acquire(cost, user)
+            try:
+                return request.execute()
+            except Exception as e:
+                if attempt == MAX_RETRIES or self.note_error(e, attempt, user) is None:
+                    raise
+
+    def usage(self):
+        now = time.time()
+        rows = self._connection().execute(
+            'SELECT name, tokens, updated, blocked_until, acquired, waited, rate_limited FROM buckets ORDER BY name'
+        ).fetchall()
+        usage = {}
+        for name, tokens, updated, blocked_until, acquired, waited, rate_limited in rows:
+            rate = self._rate(name)
+            usage[name] = {
+                'ratePerSecond': rate,
+                'available': round(min(max(rate, 1), tokens + (now - updated) * rate), 2),
+                'blockedFor': round(max(0, blocked_until - now), 2),
+                'acquired': acquired,
+                'waitedSeconds': round(waited, 2),
+                'rateLimited': rate_limited,
+            }
+        return usage
+
+
+_quota = None
+
+
+def get_quota():
+    global _quota
+    if _quota is None:
+        _quota = QuotaManager()
+    return _quota
+
+
+def execute(request, user=None, cost=1):
+    return get_quota().execute(request, user, cost)
@@ -0,0 +1,96 @@
+import itertools
+import threading
+import time
+
+# In-process stand-in for the parts of the Calendar v3 service the app uses
+# (events insert/list/delete, freebusy, batch requests). Lets the export paths
+# run end to end without credentials or network, optionally with a simulated
+# per-request latency.
+
+
+class _Request:
+    def __init__(self, func, latency):
+        self._func = func
+        self._latency = latency
+
+    def execute(self):
+        if self._latency:
+            time.sleep(self._latency)
+        return self._func()
+
+
+class _Batch:
+    def __init__(self, service, callback):
+        self._service = service
+        self._callback = callback
+        self._requests = []
+
+    def add(self, request, callback=None, request_id=None):
+        self._requests.append((request, callback or self._callback, request_id or str(len(self._requests) + 1)))
+
+    def execute(self):
+        # One round trip for the whole batch
+        if self._service.latency:
+            time.sleep(self._service.latency)
+        for request, callback, request_id in self._requests:
+            try:
+                response, exception = request._func(), None
+            except Exception as e:
+                response, exception = None, e
+            callback(request_id, response, exception)
+
+
+class _Events:
+    def __init__(self, service):
+        self._service = service
+
+    def insert(self, calendarId, body):
+        return _Request(lambda: self._service._insert(calendarId, body), self._service.latency)
+
+    def delete(self, calendarId, eventId):
+        return _Request(lambda: self._service._delete(calendarId, eventId), self._service.latency)
+
+    def list(self, calendarId, **params):
+        return _Request(lambda: {'items': list(self._service.calendars.get(calendarId, {}).values()),
+                                 'nextSyncToken': 'standin'}, self._service.latency)
+
+    def list_next(self, request, response):
+        return None
+
+
+class _FreeBusy:
+    def __init__(self, service):
+        self._service = service
+
+    def query(self, body):
+        return _Request(lambda: {'calendars': {item['id']: {'busy': []} for item in body['items']}},
+                        self._service.latency)
+
+
+class LocalCalendarService:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calendars = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def events(self):
+        return _Events(self)
+
+    def freebusy(self):
+        return _FreeBusy(self)
+
+    def new_batch_http_request(self, callback=None):
+        return _Batch(self, callback)
+
+    def _insert(self, calendar_id, body):
+        with self._lock:
+            event = dict(body, id=f'standin{next(self._ids)}', status='confirmed')
+            self.calendars.setdefault(calendar_id, {})[event['id']] = event
+        return event
+
+    def _delete(self, calendar_id, event_id):
+        with self._lock:
+            if self.calendars.get(calendar_id, {}).pop(event_id, None) is None:
+                raise KeyError(event_id)
+        return ''
@@ -0,0 +1,182 @@
+import json
+import os
+import tempfile
+import threading
+
+from calendar_quota import execute
+from google_client import is_http_error
+
+# Events created by export_to_calendar carry this private extended property so
+# they can be told apart from everything else on the user's calendar.
+APP_PROPERTY = 'nsysuCourseCalendar'
+MIRROR_PATH = 'export_mirror.json'
+
+# Partial response: only what the mirror keeps, instead of full event resources
+EVENT_FIELDS = 'id,status,summary,start,end,updated,recurringEventId,originalStartTime,extendedProperties/private'
+LIST_FIELDS = f'nextPageToken,nextSyncToken,items({EVENT_FIELDS})'
+
+
+def app_event_properties(course_id, export_id=None):
+    """extendedProperties block for an event created by the app."""
+    private = {APP_PROPERTY: '1', 'courseId': course_id}
+    if export_id:
+        private['exportId'] = export_id
+    return {'private': private}
+
+
+# Every request builds its own mirror, and they all share one file
+_save_lock = threading.Lock()
+
+
+class EventMirror:
+    """Local copy of the app-created events on a calendar, kept current via syncToken.
+
+    The first sync lists the whole calendar once (syncToken can't be combined
+    with an extended-property filter) and keeps only tagged events. After that
+    each sync sends the stored token and receives only what changed, which
+    usually means a single small page.
+    """
+
+    def __init__(self, path=MIRROR_PATH, calendar_id='primary'):
+        self.path = path
+        self.calendar_id = calendar_id
+        self.sync_token = None
+        self.events = {}
+        self.instances = {}
+        # Occurrences seen before their parent event during the current sync
+        self._orphans = {}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path) as f:
+            data = json.load(f).get(self.calendar_id, {})
+        self.sync_token = data.get('syncToken')
+        self.events = data.get('events', {})
+        self.instances = data.get('instances', {})
+
+    def save(self):
+        with _save_lock:
+            data = {}
+            if os.path.exists(self.path):
+                with open(self.path) as f:
+                    data = json.load(f)
+            data[self.calendar_id] = {
+                'syncToken': self.sync_token,
+                'events': self.events,
+                'instances': self.instances,
+            }
+            with tempfile.NamedTemporaryFile('w', dir=os.path.dirname(os.path.abspath(self.path)),
+                                             suffix='.tmp', delete=False) as f:
+                json.dump(data, f)
+            try:
+                os.replace(f.name, self.path)
+            except OSError:
+                os.unlink(f.name)
+                raise
+
+    def reset(self):
+        self.sync_token = None
+        self.events = {}
+        self.instances = {}
+
+    def _pages(self, service):
+        params = {
+            'calendarId': self.calendar_id,
+            'maxResults': 250,
+            'fields': LIST_FIELDS,
+        }
+        if self.sync_token:
+            params['syncToken'] = self.sync_token
+
+        events = service.events()
+        request = events.list(**params)
+        while request is not None:
+            response = execute(request)
+            yield response
+            request = events.list_next(request, response)
+
+    def _apply(self, item):
+        event_id = item['id']
+        parent_id = item.get('recurringEventId')
+
+        private = item.get('extendedProperties', {}).get('private', {})
+        if parent_id:
+            # A single occurrence of a recurring event was moved or deleted
+            instance = {
+                'recurringEventId': parent_id,
+                'status': item.get('status'),
+                'originalStartTime': item.get('originalStartTime'),
+                'start': item.get('start'),
+            }
+            # Listings aren't ordered, so the parent may come on a later page;
+            # cancelled occurrences don't carry the inherited tag to go by
+            if parent_id in self.events or private.get(APP_PROPERTY) == '1':
+                self.instances[event_id] = instance
+            else:
+                self._orphans[event_id] = instance
+            return 'instance'
+
+        if item.get('status') == 'cancelled' or private.get(APP_PROPERTY) != '1':
+            if self.events.pop(event_id, None) is None:
+                return None
+            self.instances = {
+                key: value for key, value in self.instances.items()
+                if value['recurringEventId'] != event_id
+            }
+            return 'removed'
+
+        self.events[event_id] = {
+            'courseId': private.get('courseId'),
+            'exportId': private.get('exportId'),
+            'summary': item.get('summary'),
+            'start': item.get('start'),
+            'end': item.get('end'),
+            'updated': item.get('updated'),
+        }
+        return 'changed'
+
+    def sync(self, service):
+        """Brings the mirror up to date and returns counts of what changed."""
+        counts = {'changed': 0, 'removed': 0, 'instance': 0, 'pages': 0}
+        self._orphans = {}
+        try:
+            for response in self._pages(service):
+                counts['pages'] += 1
+                for item in response.get('items', []):
+                    result = self._apply(item)
+                    if result:
+                        counts[result] += 1
+                if 'nextSyncToken' in response:
+                    self.sync_token = response['nextSyncToken']
+        except Exception as e:
+            # 410 Gone: the sync token expired, start over with a full sync
+            if not (is_http_error(e) and e.resp.status == 410) or not self.sync_token:
+                raise
+            self.reset()
+            return self.sync(service)
+
+        # Keep the occurrences whose parent turned up later in the listing
+        for event_id, instance in self._orphans.items():
+            if instance['recurringEventId'] in self.events:
+                self.instances[event_id] = instance
+        self._orphans = {}
+        self.save()
+        return counts
+
+    def status(self):
+        """Per-course view of what the user did with the exported events."""
+        courses = {}
+        for event_id, event in self.events.items():
+            course = courses.setdefault(event['courseId'], {'events': [], 'cancelled': [], 'moved': []})
+            course['events'].append(event_id)
+        for instance in self.instances.values():
+            parent = self.events.get(instance['recurringEventId'])
+            if parent is None:
+                continue
+            course = courses[parent['courseId']]
+            key = 'cancelled' if instance['status'] == 'cancelled' else 'moved'
+            original = instance.get('originalStartTime') or {}
+            course[key].append(original.get('dateTime') or original.get('date'))
+        return courses
@@ -0,0 +1,70 @@
+"""Measures the cold import cost of main.py with `python -X importtime`.
+
+Usage: python check_startup.py [budget_ms]
+
+Exits non-zero if importing main takes longer than the budget, or if any of the
+Google client modules or other heavy dependencies get imported at startup (they
+should load lazily).
+"""
+import os
+import subprocess
+import sys
+
+DEFAULT_BUDGET_MS = 400
+LAZY_MODULES = (
+    "googleapiclient.discovery",
+    "google_auth_oauthlib.flow",
+    "google.oauth2.credentials",
+    "google.auth.transport.requests",
+    "numpy",
+    "requests",
+    "bs4",
+)
+
+
+def measure_import(module="main"):
+    env = dict(os.environ)
+    # main.py reads these at import time
+    env.setdefault("IS_DESKTOP", "false")
+    env.setdefault("PROD", "false")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr)
+
+    # Lines look like: "import time:   self [us] | cumulative | imported package"
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = int(cumulative)
+    return timings
+
+
+def main():
+    budget_ms = float(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_BUDGET_MS
+    timings = measure_import()
+    total_ms = timings.get("main", 0) / 1000
+
+    print(f"import main: {total_ms:.1f} ms (budget {budget_ms:.0f} ms)")
+    slowest = sorted(timings.items(), key=lambda item: item[1], reverse=True)[:10]
+    for name, us in slowest:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    eager = [name for name in LAZY_MODULES if name in timings]
+    if eager:
+        print(f"Imported eagerly (should be lazy): {', '.join(eager)}")
+        sys.exit(1)
+    if total_ms > budget_ms:
+        print("Startup budget exceeded")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
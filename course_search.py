@@ -0,0 +1,273 @@
+import heapq
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+# The timetable grid and exported events cover Monday to Friday only
+GRID_DAYS = WEEKDAYS[:5]
+
+# Latin/digit words are indexed by prefix, CJK runs by character uni/bigrams
+# (Chinese titles have no spaces, so "程式設計" must match "設計" too).
+_TOKEN_RE = re.compile(r'[0-9a-z]+|[\u3400-\u9fff\uf900-\ufaff]+')
+_MAX_PREFIX = 12
+# Candidate sets up to this size are ranked directly; larger ones go tier by tier
+_RANK_ALL_LIMIT = 500
+
+
+def _is_cjk(token):
+    return token[0] >= '\u3400'
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _index_terms(text):
+    terms = set()
+    for token in tokenize(text):
+        if _is_cjk(token):
+            terms.update(token)
+            terms.update(token[i:i + 2] for i in range(len(token) - 1))
+        else:
+            terms.update(token[:i] for i in range(1, min(len(token), _MAX_PREFIX) + 1))
+    return terms
+
+
+def _query_terms(text):
+    terms = set()
+    for token in tokenize(text):
+        if _is_cjk(token) and len(token) > 1:
+            terms.update(token[i:i + 2] for i in range(len(token) - 1))
+        else:
+            terms.add(token[:_MAX_PREFIX])
+    return terms
+
+
+def load_time_ranges(path=os.path.join(DATA_DIR, 'time_codes.json')):
+    """Maps period title ('A', '1', ...) to the calendar's 'HH:MM ~ HH:MM' label."""
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    return {code['title']: f"{code['startTime']} ~ {code['endTime']}" for code in data['timeCodes']}
+
+
+def course_slots(times, time_codes, time_ranges):
+    """Groups a course's section times into per-day {day, timeRange, periods} slots."""
+    by_day = {}
+    for time_ in times:
+        index = time_['index']
+        if not 0 <= index < len(time_codes) or not 1 <= time_['weekday'] <= len(WEEKDAYS):
+            continue
+        by_day.setdefault(time_['weekday'], set()).add(index)
+
+    slots = []
+    for weekday in sorted(by_day):
+        periods = [time_codes[i] for i in sorted(by_day[weekday]) if time_codes[i] in time_ranges]
+        slots.append({
+            'day': WEEKDAYS[weekday - 1],
+            'timeRange': [time_ranges[period] for period in periods],
+            'periods': periods,
+        })
+    return slots
+
+
+def split_grid_slots(slots):
+    """(slots on the timetable's days, weekend slots it cannot hold)."""
+    return (
+        [slot for slot in slots if slot['day'] in GRID_DAYS],
+        [slot for slot in slots if slot['day'] not in GRID_DAYS],
+    )
+
+
+def load_catalog(db_path, semester=None, time_ranges=None):
+    """Reads courses written by the catalog crawler into search entries."""
+    time_ranges = time_ranges or load_time_ranges()
+    conn = sqlite3.connect(db_path)
+    try:
+        if semester is None:
+            row = conn.execute('SELECT MAX(semester) FROM courses').fetchone()
+            semester = row[0]
+        row = conn.execute('SELECT time_codes FROM meta WHERE semester = ?', (semester,)).fetchone()
+        time_codes = json.loads(row[0]) if row else list(time_ranges)
+
+        entries = []
+        rows = conn.execute(
+            'SELECT data FROM courses WHERE semester = ? ORDER BY page, position', (semester,)
+        )
+        for (data,) in rows:
+            course = json.loads(data)
+            location = course['location']
+            slots, unsupported_slots = split_grid_slots(course_slots(course['times'], time_codes, time_ranges))
+            entries.append({
+                'code': course['code'],
+                'courseName': course['title'],
+                'location': ' '.join(part for part in (location['building'], location['room']) if part),
+                'instructor': ', '.join(course['instructors']),
+                'slots': slots,
+                'unsupportedSlots': unsupported_slots,
+            })
+        return entries
+    finally:
+        conn.close()
+
+
+class CourseSearchIndex:
+    """Immutable in-memory index over course code, title and instructor."""
+
+    def __init__(self, entries):
+        self.entries = entries
+        self._codes = [entry['code'].lower() for entry in entries]
+        self._titles = [entry['courseName'].lower() for entry in entries]
+        postings = {}
+        for doc_id, entry in enumerate(entries):
+            text = f"{entry['code']} {entry['courseName']} {entry['instructor']}"
+            for term in _index_terms(text):
+                postings.setdefault(term, []).append(doc_id)
+        # Doc ids are appended in order, so every posting list is already sorted
+        self.postings = {term: tuple(ids) for term, ids in postings.items()}
+
+        # Ranking within a tier is by title length, then doc id. Keeping docs in
+        # that order up front lets broad queries take the best few of each tier
+        # without scoring every candidate.
+        self._static_order = sorted(range(len(entries)), key=lambda doc_id: (len(self._titles[doc_id]), doc_id))
+        code_prefixes = {}
+        title_prefixes = {}
+        for doc_id in self._static_order:
+            code = self._codes[doc_id]
+            title = self._titles[doc_id]
+            for i in range(1, min(len(code), _MAX_PREFIX) + 1):
+                code_prefixes.setdefault(code[:i], []).append(doc_id)
+            for i in range(1, min(len(title), _MAX_PREFIX) + 1):
+                title_prefixes.setdefault(title[:i], []).append(doc_id)
+        self._code_prefixes = {prefix: tuple(ids) for prefix, ids in code_prefixes.items()}
+        self._title_prefixes = {prefix: tuple(ids) for prefix, ids in title_prefixes.items()}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _rank(self, doc_id, query):
+        code = self._codes[doc_id]
+        title = self._titles[doc_id]
+        if code == query:
+            tier = 0
+        elif code.startswith(query):
+            tier = 1
+        elif title.startswith(query):
+            tier = 2
+        elif query in title:
+            tier = 3
+        else:
+            tier = 4
+        return (tier, len(title), doc_id)
+
+    def search(self, query, limit=10):
+        terms = _query_terms(query)
+        if not terms:
+            return []
+
+        lists = []
+        for term in terms:
+            ids = self.postings.get(term)
+            if not ids:
+                return []
+            lists.append(ids)
+        lists.sort(key=len)
+
+        candidates = set(lists[0])
+        for ids in lists[1:]:
+            candidates.intersection_update(ids)
+            if not candidates:
+                return []
+
+        normalized = ' '.join(tokenize(query))
+        if len(candidates) <= _RANK_ALL_LIMIT or len(normalized) > _MAX_PREFIX:
+            best = heapq.nsmallest(limit, candidates, key=lambda doc_id: self._rank(doc_id, normalized))
+        else:
+            best = self._best_by_tier(candidates, normalized, limit)
+        return [self.entries[doc_id] for doc_id in best]
+
+    def _best_by_tier(self, candidates, query, limit):
+        """Same result as ranking every candidate with _rank, for large candidate sets."""
+        best = []
+        taken = set()
+
+        def take(doc_ids):
+            for doc_id in doc_ids:
+                if len(best) >= limit:
+                    return
+                if doc_id in candidates and doc_id not in taken:
+                    best.append(doc_id)
+                    taken.add(doc_id)
+
+        code_matches = self._code_prefixes.get(query, ())
+        take(doc_id for doc_id in code_matches if self._codes[doc_id] == query)
+        take(code_matches)
+        take(self._title_prefixes.get(query, ()))
+        if len(best) < limit:
+            # Titles containing the query come before the rest; stop once enough are found
+            rest = []
+            for doc_id in self._static_order:
+                if doc_id not in candidates or doc_id in taken:
+                    continue
+                if query in self._titles[doc_id]:
+                    take((doc_id,))
+                    if len(best) >= limit:
+                        break
+                elif len(rest) < limit:
+                    rest.append(doc_id)
+            take(rest)
+        return best
+
+
+class SearchIndexHolder:
+    """Builds the index once and swaps in a rebuilt one when the catalog changes.
+
+    Readers grab `self.index` without locking; a rebuild replaces the reference
+    in one assignment, so requests see either the old or the new index.
+    """
+
+    def __init__(self, db_path, semester=None, check_interval=30):
+        self.db_path = db_path
+        self.semester = semester
+        self.check_interval = check_interval
+        self.index = None
+        self._mtime = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self.index is None:
+            # First use builds synchronously; later rebuilds happen in the background
+            with self._lock:
+                if self.index is None:
+                    self.refresh()
+                    self._checked_at = time.monotonic()
+            return self.index
+
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval and self._lock.acquire(blocking=False):
+            self._checked_at = now
+            threading.Thread(target=self._refresh_locked, daemon=True).start()
+        return self.index
+
+    def _refresh_locked(self):
+        try:
+            self.refresh()
+        finally:
+            self._lock.release()
+
+    def refresh(self, force=False):
+        try:
+            mtime = os.path.getmtime(self.db_path)
+        except OSError:
+            if self.index is None:
+                self.index = CourseSearchIndex([])
+            return
+        if not force and mtime == self._mtime:
+            return
+        self.index = CourseSearchIndex(load_catalog(self.db_path, self.semester))
+        self._mtime = mtime
@@ -0,0 +1,212 @@
+"""Exports whole cohorts of students to Google Calendar without the web UI.
+
+Usage:
+  python export_cli.py students.jsonl --start-date 2025-09-08 --end-date 2026-01-09
+  python export_cli.py students.jsonl --start-date ... --end-date ... --stand-in
+
+Each input line is one student:
+  {"studentId": "B123", "token": {...authorized user info...}, "courses": [...]}
+where "courses" use the same fields as /save_course, or instead of "courses"
+a scraped "courseData" ({"courses": [...], "time_codes": [...]}) as produced
+by archive/selcrs_helper.py. "tokenPath" may replace "token".
+
+--stand-in never talks to Google, and leaves weekly topics out unless
+SYLLABUS_BASE_URL is set (e.g. to a local fixture server), so a test run
+sends nothing to the live syllabus site either.
+
+Created event ids are logged per student in cli_exports.json (--export-log),
+not in the web app's export log.
+
+Finished students are appended to a checkpoint file (default:
+<input>.checkpoint.jsonl); rerunning with the same input skips them, so a
+failed or interrupted run can simply be restarted.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from academic_calendar import semester_exclusions
+from calendar_exports import ExportLog, delete_events, insert_course_events, new_export_id
+from course_search import course_slots, load_time_ranges, split_grid_slots
+from reminders import reminder_overrides
+from syllabus import course_syllabi
+
+CALENDAR_ID = 'primary'
+# Kept apart from the web app's exports.json, whose undo acts with the web user's token
+CLI_EXPORT_LOG_PATH = 'cli_exports.json'
+
+
+def courses_from_course_data(course_data, time_ranges):
+    """Scraped CourseData (as a dict) -> (app course dicts, one per meeting day, skipped weekend meetings)."""
+    courses = []
+    skipped = []
+    for course in course_data['courses']:
+        location = course['location']
+        slots, weekend_slots = split_grid_slots(course_slots(course['times'], course_data['time_codes'], time_ranges))
+        skipped.extend(f"{course['code']} {slot['day']}" for slot in weekend_slots)
+        for slot in slots:
+            if not slot['periods']:
+                continue
+            courses.append({
+                'code': course['code'],
+                'courseName': course['title'],
+                'location': ' '.join(part for part in (location['building'], location['room']) if part),
+                'instructor': ', '.join(course['instructors']),
+                **slot,
+            })
+    return courses, skipped
+
+
+def load_students(path, done):
+    time_ranges = None
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            student = json.loads(line)
+            if student['studentId'] in done:
+                continue
+            if 'courses' not in student:
+                time_ranges = time_ranges or load_time_ranges()
+                student['courses'], student['skipped'] = courses_from_course_data(student.pop('courseData'), time_ranges)
+            # The export log and event tags identify courses by added_at
+            for i, course in enumerate(student['courses']):
+                course.setdefault('added_at', f"{student['studentId']}:{i}")
+            yield student
+
+
+def load_checkpoint(path):
+    done = set()
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    done.add(json.loads(line)['studentId'])
+    return done
+
+
+def make_service(student, stand_in_latency):
+    if stand_in_latency is not None:
+        from calendar_standin import LocalCalendarService
+
+        return LocalCalendarService(latency=stand_in_latency)
+
+    from google_client import build_calendar_service, credentials_from_info, load_credentials
+
+    if 'token' in student:
+        creds = credentials_from_info(student['token'])
+    else:
+        creds = load_credentials(student['tokenPath'])
+    if creds is None:
+        raise RuntimeError('No usable credentials')
+    return build_calendar_service(creds)
+
+
+def export_student(student, start_date, end_date, skip_exam_weeks, stand_in_latency, with_syllabi):
+    """Runs in a worker. Returns a result dict instead of raising.
+
+    A failed student's events are deleted again, so a rerun starts from a
+    clean calendar instead of duplicating the events created before the error.
+    Events that could not be deleted are returned for the export log.
+    """
+    started = time.perf_counter()
+    export_id = new_export_id()
+    created_ids = []
+    error = None
+    service = None
+    try:
+        service = make_service(student, stand_in_latency)
+        excluded_dates = [day for day, _ in semester_exclusions(start_date, end_date, skip_exam_weeks)]
+        # Students sharing a course share its cached syllabus
+        syllabi = course_syllabi(student['courses'], start_date) if with_syllabi else None
+        insert_course_events(
+            service, CALENDAR_ID, student['courses'], start_date, end_date, export_id, created_ids,
+            excluded_dates, reminder_overrides(student.get('alarms')),
+            user=student['studentId'], syllabi=syllabi
+        )
+    except Exception as e:
+        error = f'{type(e).__name__}: {e}'
+        if created_ids:
+            # The stand-in keeps its events in memory, so deletes must reach the same instance
+            if stand_in_latency is not None:
+                service_factory = lambda: service
+            else:
+                service_factory = lambda: make_service(student, stand_in_latency)
+            deleted, created_ids = delete_events(service_factory, CALENDAR_ID, created_ids)
+            error += f' (rolled back {len(deleted)} events, {len(created_ids)} left behind)'
+    return {
+        'studentId': student['studentId'],
+        'exportId': export_id,
+        'eventIds': created_ids,
+        'skipped': student.get('skipped', []),
+        'error': error,
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Batch export students\' courses to Google Calendar.')
+    parser.add_argument('input', help='JSONL file, one student per line')
+    parser.add_argument('--start-date', required=True)
+    parser.add_argument('--end-date', required=True)
+    parser.add_argument('--checkpoint', help='defaults to <input>.checkpoint.jsonl')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--processes', action='store_true', help='use a process pool instead of threads')
+    parser.add_argument('--include-exam-weeks', action='store_true', help='keep classes during exam weeks')
+    parser.add_argument('--no-syllabi', action='store_true',
+                        help='leave weekly topics out of event descriptions '
+                             '(the default with --stand-in unless SYLLABUS_BASE_URL is set)')
+    parser.add_argument('--export-log', default=CLI_EXPORT_LOG_PATH, help='where created event ids are logged')
+    parser.add_argument('--stand-in', action='store_true',
+                        help='export to the local Calendar stand-in (still under the shared API quota)')
+    parser.add_argument('--stand-in-latency', type=float, default=0.0, help='simulated seconds per API call')
+    args = parser.parse_args(argv)
+
+    checkpoint_path = args.checkpoint or f'{args.input}.checkpoint.jsonl'
+    done = load_checkpoint(checkpoint_path)
+    stand_in_latency = args.stand_in_latency if args.stand_in else None
+    export_log = None if args.stand_in else ExportLog(args.export_log)
+    # A stand-in run only fetches syllabi from an explicitly configured server
+    with_syllabi = not args.no_syllabi and (not args.stand_in or 'SYLLABUS_BASE_URL' in os.environ)
+
+    pool_class = ProcessPoolExecutor if args.processes else ThreadPoolExecutor
+    started = time.perf_counter()
+    exported = failed = events = 0
+
+    # Results come back to this process, which alone writes the checkpoint and export log
+    with pool_class(max_workers=args.workers) as pool, open(checkpoint_path, 'a', encoding='utf-8') as checkpoint:
+        futures = [
+            pool.submit(export_student, student, args.start_date, args.end_date,
+                        not args.include_exam_weeks, stand_in_latency, with_syllabi)
+            for student in load_students(args.input, done)
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            events += len(result['eventIds'])
+            if export_log is not None and result['eventIds']:
+                export_log.record(result['exportId'], CALENDAR_ID, result['eventIds'],
+                                  studentId=result['studentId'], startDate=args.start_date, endDate=args.end_date)
+            if result['skipped']:
+                print(f"{result['studentId']}: weekend meetings not exported: {', '.join(result['skipped'])}",
+                      file=sys.stderr)
+            if result['error']:
+                failed += 1
+                print(f"{result['studentId']}: failed: {result['error']}", file=sys.stderr)
+                continue
+            exported += 1
+            checkpoint.write(json.dumps(result) + '\n')
+            checkpoint.flush()
+
+    elapsed = time.perf_counter() - started
+    print(f'Exported {exported} students ({events} events) in {elapsed:.2f}s, '
+          f'{failed} failed, {len(done)} skipped from checkpoint')
+    if elapsed > 0:
+        print(f'Throughput: {exported / elapsed:.1f} students/s, {events / elapsed:.1f} events/s')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,58 @@
+import os
+import sys
+
+# The google-auth / googleapiclient stack is heavy to import (discovery pulls in
+# httplib2, uritemplate, the auth transports, ...). Everything in here imports it
+# on first use so that worker boots and requests that never touch Google don't
+# pay for it.
+
+SCOPES = ["https://www.googleapis.com/auth/calendar"]
+TOKEN_PATH = "token.json"
+
+
+def load_credentials(token_path=TOKEN_PATH, scopes=SCOPES):
+    """Returns refreshed credentials from `token_path`, or None if unusable."""
+    if not os.path.exists(token_path):
+        return None
+
+    from google.oauth2.credentials import Credentials
+
+    creds = Credentials.from_authorized_user_file(token_path, scopes)
+    if creds.valid:
+        return creds
+    if creds.expired and creds.refresh_token:
+        from google.auth.transport.requests import Request
+
+        creds.refresh(Request())
+        return creds
+    return None
+
+
+def credentials_from_info(info, scopes=SCOPES):
+    from google.oauth2.credentials import Credentials
+
+    return Credentials.from_authorized_user_info(info, scopes)
+
+
+def build_calendar_service(creds):
+    from googleapiclient.discovery import build
+
+    return build("calendar", "v3", credentials=creds, cache_discovery=False)
+
+
+def make_flow(client_secrets_path, redirect_uri, state=None, scopes=SCOPES):
+    from google_auth_oauthlib.flow import Flow
+
+    return Flow.from_client_secrets_file(
+        client_secrets_path,
+        scopes=scopes,
+        state=state,
+        redirect_uri=redirect_uri
+    )
+
+
+def is_http_error(error):
+    # Only check against HttpError if googleapiclient was actually loaded;
+    # if it wasn't, nothing could have raised one.
+    errors = sys.modules.get("googleapiclient.errors")
+    return errors is not None and isinstance(error, errors.HttpError)
@@ -1,19 +1,21 @@
-from flask import Flask, render_template, request, jsonify, Response
+from flask import Flask, request, jsonify, Response, session, redirect
 import json
-from datetime import datetime, timedelta
+from datetime import datetime
 import random
 import os
-from google.oauth2.credentials import Credentials
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import Flow
-from google.auth.transport.requests import Request
-import os
-from flask import session, redirect, request
 from dotenv import load_dotenv
 
+from academic_calendar import semester_exclusions
+from calendar_quota import get_quota
+from calendar_exports import ExportLog, insert_course_events, new_export_id, undo_export
+from calendar_sync import EventMirror
+from course_search import SearchIndexHolder, load_time_ranges
+from reminders import OutboxSink, ReminderScheduler, reminder_overrides, start_delivery_thread
+from syllabus import course_syllabi
+from timetable import TimetableCache
+from web_assets import AssetBundle, PageCache, compress_json, etag_matches
+from google_client import build_calendar_service, is_http_error, load_credentials, make_flow
+
 load_dotenv()
 
 # Allow OAuth2 to work over HTTP during development
@@ -45,8 +47,6 @@ COURSE_COLORS = [
 ]
 
 # Google Calendar API configuration
-SCOPES = ["https://www.googleapis.com/auth/calendar"]
-
 IS_DESKTOP = os.getenv("IS_DESKTOP").lower() == "true"
 DESKTOP_CREDENTIALS_PATH = os.getenv("DESKTOP_CREDENTIALS_PATH")
 WEB_CREDENTIALS_PATH = os.getenv("WEB_CREDENTIALS_PATH")
@@ -54,42 +54,54 @@ PROD_WEB_CREDENTIALS_PATH = os.getenv("PROD_WEB_CREDENTIALS_PATH")
 IS_PROD = os.getenv("PROD").lower() == "true"
 REDIRECT_URI = os.getenv("PROD_REDIRECT_URI") if IS_PROD else os.getenv("LOCAL_REDIRECT_URI")
 
+# Event ids created by each export, for undo
+export_log = ExportLog()
+
+# Pending exam reminders, delivered in batches to the outbox by a background thread
+reminder_scheduler = ReminderScheduler()
+reminder_delivery = None
+
+# Course catalog written by archive/catalog_crawler.py, indexed for the add-course popup
+search_index = SearchIndexHolder(
+	os.getenv("CATALOG_DB_PATH", "catalog.db"),
+	semester=os.getenv("CATALOG_SEMESTER") or None
+)
+
+# Period x weekday grid of the saved courses, rebuilt after each change
+timetable_cache = TimetableCache(load_time_ranges())
+
+# Fingerprinted static files and pre-rendered pages, compressed once at startup
+assets = AssetBundle(app.static_folder)
+app.add_template_global(assets.url, 'asset_url')
+pages = PageCache(app, ['index.html', 'calendar.html'])
+pages.prerender()
+app.after_request(compress_json)
+
+def get_client_secrets_path():
+    return PROD_WEB_CREDENTIALS_PATH if IS_PROD else WEB_CREDENTIALS_PATH
+
 def get_google_calendar_service():
-    creds = None
-
-    if os.path.exists("token.json"):
-        creds = Credentials.from_authorized_user_file("token.json", SCOPES)
-
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            flow = Flow.from_client_secrets_file(
-                PROD_WEB_CREDENTIALS_PATH if IS_PROD else WEB_CREDENTIALS_PATH,
-                scopes=SCOPES,
-                redirect_uri=REDIRECT_URI
-            )
-            auth_url, state = flow.authorization_url(
-                access_type='offline',
-                include_granted_scopes='true'
-            )
-            session['state'] = state
-            return redirect(auth_url)
+    creds = load_credentials()
+
+    if not creds:
+        flow = make_flow(get_client_secrets_path(), REDIRECT_URI)
+        auth_url, state = flow.authorization_url(
+            access_type='offline',
+            include_granted_scopes='true'
+        )
+        session['state'] = state
+        return redirect(auth_url)
 
-    return build("calendar", "v3", credentials=creds)
+    return build_calendar_service(creds)
 
 @app.route("/")
 @app.route("/index")
 def index():
-	return render_template("index.html")
+	return pages.response("index.html")
 
 @app.route('/authorize')
 def authorize():
-    flow = Flow.from_client_secrets_file(
-        PROD_WEB_CREDENTIALS_PATH if IS_PROD else WEB_CREDENTIALS_PATH,
-        scopes=SCOPES,
-        redirect_uri=REDIRECT_URI
-    )
+    flow = make_flow(get_client_secrets_path(), REDIRECT_URI)
     auth_url, state = flow.authorization_url(
         access_type='offline',
         include_granted_scopes='true'
@@ -100,12 +112,7 @@ def authorize():
 @app.route('/oauth2callback')
 def oauth2callback():
     state = session['state']
-    flow = Flow.from_client_secrets_file(
-        PROD_WEB_CREDENTIALS_PATH if IS_PROD else WEB_CREDENTIALS_PATH,
-        scopes=SCOPES,
-        state=state,
-        redirect_uri=REDIRECT_URI
-    )
+    flow = make_flow(get_client_secrets_path(), REDIRECT_URI, state=state)
     flow.fetch_token(authorization_response=request.url)
     
     creds = flow.credentials
@@ -116,7 +123,14 @@ def oauth2callback():
 
 @app.route("/calendar")
 def calendar():
-	return render_template("calendar.html")
+	return pages.response("calendar.html")
+
+@app.route('/assets/<path:filename>')
+def asset(filename):
+	response = assets.response(filename)
+	if response is None:
+		return "Not found", 404
+	return response
 
 @app.route('/save_course', methods=['POST'])
 def save_course():
@@ -142,6 +156,7 @@ def save_course():
 		
 		# Add the course to our storage
 		courses.append(course_data)
+		timetable_cache.invalidate()
 		
 		return jsonify({
 			"status": "success",
@@ -179,6 +194,7 @@ def update_course():
 				course_data['color'] = course['color']
 				course_data['added_at'] = course['added_at']  # Preserve the original timestamp
 				courses[i] = course_data
+				timetable_cache.invalidate()
 				course_found = True
 				break
 		
@@ -221,6 +237,7 @@ def delete_course():
 		for i, course in enumerate(courses):
 			if course['added_at'] == course_id:
 				courses.pop(i)
+				timetable_cache.invalidate()
 				course_found = True
 				break
 		
@@ -247,6 +264,49 @@ def delete_course():
 def get_courses():
 	return jsonify(courses)
 
+@app.route('/timetable', methods=['GET'])
+def timetable():
+	etag, body = timetable_cache.get(courses)
+	if etag_matches(etag):
+		return Response(status=304, headers={'ETag': etag})
+	return Response(body, mimetype='application/json', headers={'ETag': etag, 'Cache-Control': 'no-cache'})
+
+@app.route('/search_courses', methods=['GET'])
+def search_courses():
+	query = request.args.get('q', '').strip()
+	try:
+		limit = min(max(int(request.args.get('limit', 10)), 1), 50)
+	except ValueError:
+		limit = 10
+
+	if not query:
+		return jsonify([])
+	return jsonify(search_index.get().search(query, limit))
+
+@app.route('/holidays', methods=['GET'])
+def holidays():
+	start_date = request.args.get('startDate')
+	end_date = request.args.get('endDate')
+	if not start_date or not end_date:
+		return jsonify({'status': 'error', 'message': 'Missing required data'}), 400
+
+	try:
+		exclusions = semester_exclusions(start_date, end_date, request.args.get('skipExamWeeks', 'true') == 'true')
+	except ValueError:
+		return jsonify({'status': 'error', 'message': 'Invalid date'}), 400
+	return jsonify([{'date': day.isoformat(), 'name': name} for day, name in exclusions])
+
+def schedule_exam_reminders(student_id, start_date):
+    global reminder_delivery
+    reminder_scheduler.schedule_student(student_id, courses, start_date)
+    if reminder_delivery is None:
+        reminder_delivery = start_delivery_thread(reminder_scheduler, OutboxSink())
+
+@app.route('/reminders', methods=['GET'])
+def get_reminders():
+	student_id = request.args.get('studentId') or 'default'
+	return jsonify([reminder.to_dict() for reminder in reminder_scheduler.pending(student_id)])
+
 @app.route('/export_to_calendar', methods=['POST'])
 def export_to_calendar():
     try:
@@ -264,63 +324,117 @@ def export_to_calendar():
         service = get_google_calendar_service()
         calendar_id = 'primary'
         
-        # Convert start_date to datetime for manipulation
-        base_start_date = datetime.strptime(start_date, '%Y-%m-%d')
+        # Sequential alarms are attached to each event in the insert call itself
+        alarms = data.get('alarms')
+        if alarms is not None and not (isinstance(alarms, list) and all(isinstance(alarm, int) for alarm in alarms)):
+            return jsonify({'status': 'error', 'message': 'alarms must be a list of minutes'}), 400
+        reminders = reminder_overrides(alarms)
         
-        # Create events for each course
-        for course in courses:
-            # Get the first and last time ranges to determine the full duration
-            first_time_range = course['timeRange'][0]
-            last_time_range = course['timeRange'][-1]
-            
-            # Extract start time from first range and end time from last range
-            start_time = first_time_range.split('~')[0].strip()
-            end_time = last_time_range.split('~')[1].strip()
-            
-            # Map days to numbers (0 = Monday, 1 = Tuesday, etc.)
-            day_mapping = {
-                'Monday': 0,
-                'Tuesday': 1,
-                'Wednesday': 2,
-                'Thursday': 3,
-                'Friday': 4
-            }
-            
-            course_day = day_mapping[course['day']]
-            base_day = base_start_date.weekday()  # 0 = Monday, 1 = Tuesday, etc.
-            
-            # Calculate days to add to reach the correct day of the week
-            days_to_add = (course_day - base_day) % 7
-            course_start_date = base_start_date + timedelta(days=days_to_add)
-            
-            # Format the adjusted start date
-            adjusted_start_date = course_start_date.strftime('%Y-%m-%d')
-            
-            event = {
-                'summary': course['courseName'],
-                'location': course['location'],
-                'description': f"Instructor: {course['instructor']}" if course.get('instructor') else '',
-                'start': {
-                    'dateTime': f"{adjusted_start_date}T{start_time}:00",
-                    'timeZone': 'Asia/Taipei',
-                },
-                'end': {
-                    'dateTime': f"{adjusted_start_date}T{end_time}:00",
-                    'timeZone': 'Asia/Taipei',
-                },
-                'recurrence': [
-                    f'RRULE:FREQ=WEEKLY;UNTIL={end_date.replace("-", "")}T235959Z;BYDAY={["MO", "TU", "WE", "TH", "FR"][course_day]}'
-                ],
-            }
-            
-            service.events().insert(calendarId=calendar_id, body=event).execute()
+        # Holidays and exam weeks are skipped via EXDATE, no extra API calls
+        excluded_dates = [day for day, _ in semester_exclusions(start_date, end_date, data.get('skipExamWeeks', True))]
+        
+        # Optionally refuse to write anything if courses collide with existing events
+        if data.get('checkConflicts') and not data.get('force'):
+            # Imported here: it pulls in NumPy, which most requests never need
+            from calendar_conflicts import check_conflicts
+
+            conflicts = check_conflicts(service, courses, start_date, end_date, calendar_id, excluded_dates)
+            if conflicts:
+                return jsonify({
+                    'status': 'conflict',
+                    'message': 'Some courses overlap existing events in your calendar',
+                    'conflicts': conflicts
+                }), 409
+        
+        # Weekly topics from the syllabi of courses picked from the catalog
+        syllabi = course_syllabi(courses, start_date, data.get('semester'))
         
-        return jsonify({'status': 'success', 'message': 'Courses exported to Google Calendar successfully'})
+        # Create events for each course, recording their ids so the export can be undone
+        export_id = new_export_id()
+        created_ids = []
+        try:
+            insert_course_events(
+                service, calendar_id, courses, start_date, end_date, export_id, created_ids,
+                excluded_dates, reminders, syllabi=syllabi
+            )
+        finally:
+            if created_ids:
+                export_log.record(export_id, calendar_id, created_ids, startDate=start_date, endDate=end_date)
+        
+        schedule_exam_reminders(data.get('studentId') or 'default', start_date)
         
-    except HttpError as error:
-        return jsonify({'status': 'error', 'message': f'Google Calendar API error: {str(error)}'}), 500
+        return jsonify({
+            'status': 'success',
+            'message': 'Courses exported to Google Calendar successfully',
+            'exportId': export_id
+        })
+        
+    except Exception as e:
+        if is_http_error(e):
+            return jsonify({'status': 'error', 'message': f'Google Calendar API error: {str(e)}'}), 500
+        return jsonify({'status': 'error', 'message': f'Error: {str(e)}'}), 500
+
+@app.route('/undo_export', methods=['POST'])
+def undo_export_route():
+    try:
+        data = request.get_json(silent=True) or {}
+        export_id = data.get('exportId') or export_log.latest()
+        if not export_id:
+            return jsonify({'status': 'error', 'message': 'No export to undo'}), 404
+
+        if not load_credentials():
+            return jsonify({'status': 'error', 'message': 'Not authenticated'}), 401
+
+        result = undo_export(lambda: build_calendar_service(load_credentials()), export_log, export_id)
+        if result is None:
+            return jsonify({'status': 'error', 'message': 'Export not found'}), 404
+
+        deleted, failed = result
+        if failed:
+            # Whatever was deleted is forgotten, so retrying only touches the rest
+            return jsonify({
+                'status': 'error',
+                'message': f'Removed {deleted} events, {failed} could not be removed. Please try again.',
+                'exportId': export_id
+            }), 502
+
+        return jsonify({'status': 'success', 'message': f'Removed {deleted} events', 'exportId': export_id})
+
     except Exception as e:
         return jsonify({'status': 'error', 'message': f'Error: {str(e)}'}), 500
 
+@app.route('/export_status', methods=['GET'])
+def export_status():
+    try:
+        if not os.path.exists("token.json"):
+            return jsonify({'status': 'error', 'message': 'Not authenticated'}), 401
+
+        service = get_google_calendar_service()
+        mirror = EventMirror()
+        changes = mirror.sync(service)
+        exported = mirror.status()
+
+        result = []
+        for course in courses:
+            course_status = exported.get(course['added_at'])
+            result.append({
+                'courseId': course['added_at'],
+                'courseName': course['courseName'],
+                'exported': bool(course_status),
+                'cancelled': course_status['cancelled'] if course_status else [],
+                'moved': course_status['moved'] if course_status else [],
+            })
+
+        return jsonify({'status': 'success', 'courses': result, 'changes': changes})
+
+    except Exception as e:
+        if is_http_error(e):
+            return jsonify({'status': 'error', 'message': f'Google Calendar API error: {str(e)}'}), 500
+        return jsonify({'status': 'error', 'message': f'Error: {str(e)}'}), 500
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+	return jsonify({'calendarQuota': get_quota().usage()})
+
 if __name__ == '__main__':
 	app.run(debug=True)
\ No newline at end of file
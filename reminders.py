@@ -0,0 +1,195 @@
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+from academic_calendar import get_holiday_index
+from calendar_events import DAY_MAPPING, TAIPEI, course_time_span
+
+# Sequential alarms before every class, in minutes
+DEFAULT_ALARMS = [30, 10]
+# Calendar allows at most 5 overrides, each at most four weeks before the event
+MAX_OVERRIDES = 5
+MAX_OVERRIDE_MINUTES = 40320
+# Exam preparation reminders, in days before the exam
+EXAM_REMINDER_DAYS = [21, 7, 1]
+OUTBOX_PATH = 'reminder_outbox.jsonl'
+
+
+def reminder_overrides(alarms=None):
+    """`reminders` block for an event body, so alarms ship with the insert itself."""
+    alarms = DEFAULT_ALARMS if alarms is None else alarms
+    minutes = sorted({int(alarm) for alarm in alarms if 0 <= int(alarm) <= MAX_OVERRIDE_MINUTES}, reverse=True)
+    return {
+        'useDefault': False,
+        'overrides': [{'method': 'popup', 'minutes': minute} for minute in minutes[:MAX_OVERRIDES]],
+    }
+
+
+@dataclass(slots=True)
+class Reminder:
+    due: float
+    student_id: str
+    course_id: str
+    course_name: str
+    exam: str
+    exam_start: float
+
+    def to_dict(self):
+        return {
+            'due': datetime.fromtimestamp(self.due, TAIPEI).isoformat(),
+            'studentId': self.student_id,
+            'courseId': self.course_id,
+            'courseName': self.course_name,
+            'exam': self.exam,
+            'examStart': datetime.fromtimestamp(self.exam_start, TAIPEI).isoformat(),
+        }
+
+
+def exam_reminders(student_id, courses, start_date, days_before=EXAM_REMINDER_DAYS):
+    """Reminders ahead of each course's midterm and final for one student."""
+    exam_weeks = get_holiday_index().exam_weeks_for(date.fromisoformat(start_date))
+    for course in courses:
+        start_time, _ = course_time_span(course)
+        hour, minute = map(int, start_time.split(':'))
+        for exam, monday in exam_weeks:
+            # The exam is held in the course's regular slot during exam week
+            exam_day = monday + timedelta(days=DAY_MAPPING[course['day']])
+            exam_start = datetime(exam_day.year, exam_day.month, exam_day.day, hour, minute, tzinfo=TAIPEI)
+            for days in days_before:
+                yield Reminder(
+                    due=(exam_start - timedelta(days=days)).timestamp(),
+                    student_id=student_id,
+                    course_id=course['added_at'],
+                    course_name=course['courseName'],
+                    exam=exam,
+                    exam_start=exam_start.timestamp(),
+                )
+
+
+class ReminderScheduler:
+    """Min-heap of pending reminders ordered by due time.
+
+    Only pending reminders are held; delivered ones are popped off the heap.
+    Each student with pending reminders has a generation token, taken from a
+    counter that never repeats. Rescheduling a student drops their token, so
+    their old entries are stale and are discarded lazily when they reach the
+    top instead of being searched for. Once stale entries make up half the heap
+    it is rebuilt without them. A student's bookkeeping goes away with their
+    last pending reminder.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._counter = itertools.count()
+        self._generations = itertools.count(1)
+        self._generation = {}
+        self._pending_count = {}
+        self._stale = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def schedule(self, reminders, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            for reminder in reminders:
+                if reminder.due < now:
+                    continue
+                generation = self._generation.get(reminder.student_id)
+                if generation is None:
+                    generation = self._generation[reminder.student_id] = next(self._generations)
+                heapq.heappush(self._heap, (reminder.due, next(self._counter), generation, reminder))
+                self._pending_count[reminder.student_id] = self._pending_count.get(reminder.student_id, 0) + 1
+
+    def schedule_student(self, student_id, courses, start_date, now=None):
+        """Replaces a student's pending exam reminders with ones for `courses`."""
+        self.cancel_student(student_id)
+        self.schedule(exam_reminders(student_id, courses, start_date), now)
+
+    def cancel_student(self, student_id):
+        with self._lock:
+            self._generation.pop(student_id, None)
+            self._stale += self._pending_count.pop(student_id, 0)
+            if self._stale * 2 > len(self._heap):
+                self._heap = [entry for entry in self._heap if self._is_current(entry[2], entry[3])]
+                heapq.heapify(self._heap)
+                self._stale = 0
+
+    def _is_current(self, generation, reminder):
+        return generation == self._generation.get(reminder.student_id)
+
+    def pop_due(self, now=None, limit=1000):
+        """Removes and returns up to `limit` reminders that are due."""
+        now = time.time() if now is None else now
+        batch = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now and len(batch) < limit:
+                _, _, generation, reminder = heapq.heappop(self._heap)
+                if not self._is_current(generation, reminder):
+                    self._stale -= 1
+                    continue
+                batch.append(reminder)
+                count = self._pending_count[reminder.student_id] - 1
+                if count:
+                    self._pending_count[reminder.student_id] = count
+                else:
+                    del self._pending_count[reminder.student_id]
+                    del self._generation[reminder.student_id]
+        return batch
+
+    def pending(self, student_id):
+        with self._lock:
+            entries = [
+                reminder for _, _, generation, reminder in self._heap
+                if reminder.student_id == student_id and self._is_current(generation, reminder)
+            ]
+        return sorted(entries, key=lambda reminder: reminder.due)
+
+    def next_due(self):
+        with self._lock:
+            return self._heap[0][0] if self._heap else None
+
+    def deliver_due(self, deliver, now=None, batch_size=1000):
+        """Hands due reminders to `deliver` in batches. Returns how many were delivered."""
+        delivered = 0
+        while True:
+            batch = self.pop_due(now, batch_size)
+            if not batch:
+                return delivered
+            deliver(batch)
+            delivered += len(batch)
+
+
+class OutboxSink:
+    """Appends each delivered batch to a JSON Lines outbox for the mail/push sender."""
+
+    def __init__(self, path=OUTBOX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def __call__(self, batch):
+        lines = ''.join(json.dumps(reminder.to_dict(), ensure_ascii=False) + '\n' for reminder in batch)
+        with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def start_delivery_thread(scheduler, deliver, interval=60):
+    """Delivers due reminders every `interval` seconds in a daemon thread."""
+    def loop():
+        while True:
+            scheduler.deliver_due(deliver)
+            next_due = scheduler.next_due()
+            wait = interval if next_due is None else min(interval, max(next_due - time.time(), 1))
+            time.sleep(wait)
+
+    thread = threading.Thread(target=loop, daemon=True, name='reminder-delivery')
+    thread.start()
+    return thread
@@ -0,0 +1,225 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+# Weekly topics scraped from each course's syllabus page, cached per
+# (semester, course code) in memory and in a SQLite file. Every student taking
+# a course, and every worker process, reuses the same cached syllabus; the site
+# is only asked for codes nobody has fetched recently.
+
+SYLLABUS_BASE_URL = os.getenv('SYLLABUS_BASE_URL', 'https://cu.nsysu.edu.tw')
+SYLLABUS_PATH = os.getenv('SYLLABUS_PATH', '/syllabus.asp?SYEAR={year}&SEM={term}&CRSNO={code}')
+SYLLABUS_DB_PATH = os.getenv('SYLLABUS_DB_PATH', 'syllabus.db')
+SYLLABUS_WORKERS = 8
+REQUEST_TIMEOUT = 10
+# Syllabi rarely change once the semester starts; courses with no syllabus
+# posted yet are looked up again sooner, and failed downloads sooner still,
+# so an unreachable site costs one timeout per course rather than per student
+CACHE_TTL = 7 * 24 * 3600
+EMPTY_CACHE_TTL = 24 * 3600
+FAILED_CACHE_TTL = 10 * 60
+MAX_TOPIC_LENGTH = 200
+
+# "1", "Week 1", "第1週" / "第1周"
+WEEK_PATTERN = re.compile(r'^(?:week\s*|\u7b2c\s*)?(\d{1,2})(?:\s*[\u9031\u5468])?$', re.IGNORECASE)
+DATE_PATTERN = re.compile(r'^(?:\d{2,4}[/.-])?\d{1,2}[/.-]\d{1,2}(?:\s*\(.\))?$')
+
+
+def semester_code(start_date):
+    """'2025-09-08' -> '1141' (ROC year + term: 1 fall, 2 spring, 3 summer)."""
+    day = date.fromisoformat(start_date)
+    if day.month >= 8:
+        return f'{day.year - 1911}1'
+    if day.month == 1:
+        return f'{day.year - 1912}1'
+    if day.month <= 6:
+        return f'{day.year - 1912}2'
+    return f'{day.year - 1912}3'
+
+
+def cache_ttl(topics):
+    """Seconds a result stays fresh; `topics` is None for a failed download."""
+    if topics is None:
+        return FAILED_CACHE_TTL
+    return CACHE_TTL if topics else EMPTY_CACHE_TTL
+
+
+def parse_weekly_topics(html):
+    """[(week, topic)] from the schedule table of a syllabus page."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    topics = {}
+    for row in soup.find_all('tr'):
+        cells = [cell.get_text(' ', strip=True) for cell in row.find_all(['td', 'th'], recursive=False)]
+        if len(cells) < 2:
+            continue
+        match = WEEK_PATTERN.match(cells[0])
+        if not match:
+            continue
+        week = int(match.group(1))
+        topic = next((cell for cell in cells[1:] if cell and not DATE_PATTERN.match(cell)), None)
+        if topic and 1 <= week <= 30 and week not in topics:
+            topics[week] = ' '.join(topic.split())[:MAX_TOPIC_LENGTH]
+    return sorted(topics.items())
+
+
+class SyllabusCache:
+    def __init__(self, path=SYLLABUS_DB_PATH):
+        self.path = path
+        self._pid = None
+        self._conn = None
+
+    def _connection(self):
+        # SQLite connections must not cross fork(); reopen in each process
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS syllabi (
+                    semester TEXT NOT NULL,
+                    code TEXT NOT NULL,
+                    topics TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    PRIMARY KEY (semester, code)
+                )
+            ''')
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def get(self, semester, code, now=None):
+        """(topics, expires_at) if a fresh entry exists, else None."""
+        row = self._connection().execute(
+            'SELECT topics, fetched_at FROM syllabi WHERE semester = ? AND code = ?', (semester, code)
+        ).fetchone()
+        if row is None:
+            return None
+        topics = json.loads(row[0])
+        if topics is not None:
+            topics = [tuple(item) for item in topics]
+        expires_at = row[1] + cache_ttl(topics)
+        now = time.time() if now is None else now
+        return (topics, expires_at) if now < expires_at else None
+
+    def put(self, semester, code, topics):
+        """Stores a download's topics; None records a failed download."""
+        self._connection().execute(
+            'INSERT OR REPLACE INTO syllabi (semester, code, topics, fetched_at) VALUES (?, ?, ?, ?)',
+            (semester, code, json.dumps(topics, ensure_ascii=False), time.time())
+        )
+
+
+class SyllabusFetcher:
+    """Fetches weekly topics for many course codes at once.
+
+    Codes are looked up in memory, then in the shared cache, and only the
+    rest are downloaded, on a bounded thread pool. Concurrent callers asking
+    for the same course wait on one download instead of starting their own.
+    A failed download yields no topics and is cached for FAILED_CACHE_TTL.
+    """
+
+    def __init__(self, base_url=SYLLABUS_BASE_URL, cache=None, max_workers=SYLLABUS_WORKERS,
+                 timeout=REQUEST_TIMEOUT):
+        self.base_url = base_url.rstrip('/')
+        self.cache = cache or SyllabusCache()
+        self.timeout = timeout
+        self._max_workers = max_workers
+        self._pool = None
+        self._memory = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def url(self, code, semester):
+        return self.base_url + SYLLABUS_PATH.format(year=semester[:3], term=semester[3:], code=code)
+
+    def _session(self):
+        # requests.Session isn't documented as thread-safe; one per worker thread
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            import requests
+
+            session = self._local.session = requests.Session()
+        return session
+
+    def _download(self, code, semester):
+        """(topics, expires_at); topics is None if the download failed."""
+        try:
+            response = self._session().get(self.url(code, semester), timeout=self.timeout)
+            response.raise_for_status()
+            topics = parse_weekly_topics(response.content)
+        except Exception:
+            topics = None
+        try:
+            self.cache.put(semester, code, topics)
+        except sqlite3.Error:
+            pass
+        return topics, time.time() + cache_ttl(topics)
+
+    def _finish(self, key, future):
+        with self._lock:
+            self._in_flight.pop(key, None)
+            if future.exception() is None:
+                self._memory[key] = future.result()
+
+    def _cached(self, key):
+        """(topics, expires_at) from memory or the shared cache, or None."""
+        entry = self._memory.get(key)
+        if entry is not None and time.time() < entry[1]:
+            return entry
+        entry = self.cache.get(key[0], key[1])
+        if entry is not None:
+            self._memory[key] = entry
+        return entry
+
+    def topics_for(self, codes, semester):
+        """{code: [(week, topic)]} for every code that has a syllabus."""
+        result = {}
+        futures = {}
+        submitted = []
+        with self._lock:
+            for code in set(filter(None, codes)):
+                key = (semester, code)
+                entry = self._cached(key)
+                if entry is not None:
+                    result[code] = entry[0]
+                elif key in self._in_flight:
+                    futures[code] = self._in_flight[key]
+                else:
+                    if self._pool is None:
+                        self._pool = ThreadPoolExecutor(max_workers=self._max_workers,
+                                                        thread_name_prefix='syllabus')
+                    future = self._pool.submit(self._download, code, semester)
+                    self._in_flight[key] = future
+                    futures[code] = future
+                    submitted.append(code)
+        # Outside the lock: a callback on an already finished future runs right away
+        for code in submitted:
+            futures[code].add_done_callback(lambda done, key=(semester, code): self._finish(key, done))
+        for code, future in futures.items():
+            result[code] = future.result()[0]
+        return {code: topics for code, topics in result.items() if topics}
+
+
+_fetcher = None
+
+
+def get_fetcher():
+    global _fetcher
+    if _fetcher is None:
+        _fetcher = SyllabusFetcher()
+    return _fetcher
+
+
+def course_syllabi(courses, start_date, semester=None):
+    """Weekly topics for the courses that carry a catalog code, by code."""
+    codes = [course.get('code') for course in courses]
+    if not any(codes):
+        return {}
+    return get_fetcher().topics_for(codes, semester or semester_code(start_date))
@@ -0,0 +1,12 @@
+from calendar_exports import ExportLog
+
+
+def test_latest_skips_batch_exports(tmp_path):
+    log = ExportLog(str(tmp_path / 'exports.json'))
+    log.record('web', 'primary', ['a'])
+    log.record('cli', 'primary', ['b'], studentId='B123')
+
+    assert log.latest() == 'web'
+    log.forget('web', ['a'])
+    assert log.latest() is None
+    assert log.get('cli')['eventIds'] == ['b']
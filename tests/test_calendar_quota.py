@@ -0,0 +1,46 @@
+import threading
+
+from calendar_quota import PROJECT_BUCKET, QuotaManager
+
+
+def run_threads(target, count):
+    errors = []
+
+    def wrapped():
+        try:
+            target()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=wrapped) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+def test_acquire_from_many_threads(tmp_path):
+    quota = QuotaManager(str(tmp_path / 'quota.db'), project_qps=100000, user_qps=100000)
+
+    def worker():
+        for _ in range(200):
+            quota.acquire(user='student')
+
+    assert run_threads(worker, 8) == []
+    usage = quota.usage()
+    assert usage[PROJECT_BUCKET]['acquired'] == 1600
+    assert usage['user:student']['acquired'] == 1600
+
+
+def test_block_and_acquire_interleaved(tmp_path):
+    quota = QuotaManager(str(tmp_path / 'quota.db'), project_qps=100000, user_qps=100000)
+
+    def worker():
+        for i in range(100):
+            if i % 10 == 0:
+                quota.block(0, user='student')
+            quota.acquire(user='student')
+
+    assert run_threads(worker, 8) == []
+    assert quota.usage()['user:student']['rateLimited'] == 80
@@ -0,0 +1,32 @@
+import json
+import threading
+
+from calendar_sync import EventMirror
+
+
+def test_concurrent_saves_keep_every_calendar(tmp_path):
+    path = str(tmp_path / 'export_mirror.json')
+    errors = []
+
+    def worker(i):
+        try:
+            for _ in range(20):
+                mirror = EventMirror(path, calendar_id=f'calendar{i}')
+                mirror.sync_token = f'token{i}'
+                mirror.save()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    with open(path) as f:
+        data = json.load(f)
+    assert {calendar_id: entry['syncToken'] for calendar_id, entry in data.items()} == {
+        f'calendar{i}': f'token{i}' for i in range(8)
+    }
+    assert list(tmp_path.iterdir()) == [tmp_path / 'export_mirror.json']
@@ -0,0 +1,60 @@
+import calendar_quota
+import export_cli
+from calendar_quota import QuotaManager
+from calendar_standin import LocalCalendarService
+
+
+class FailingCalendarService(LocalCalendarService):
+    """Stand-in whose inserts start failing after `fail_after` events."""
+
+    def __init__(self, fail_after):
+        super().__init__()
+        self.fail_after = fail_after
+
+    def _insert(self, calendar_id, body):
+        if self.fail_after == 0:
+            raise RuntimeError('insert failed')
+        self.fail_after -= 1
+        return super()._insert(calendar_id, body)
+
+
+def course(i, day='Monday'):
+    return {
+        'added_at': f'B123:{i}',
+        'courseName': f'Course {i}',
+        'location': 'LI 101',
+        'day': day,
+        'timeRange': ['08:10 ~ 09:00'],
+    }
+
+
+def test_failed_export_is_rolled_back(tmp_path, monkeypatch):
+    monkeypatch.setattr(calendar_quota, '_quota', QuotaManager(str(tmp_path / 'quota.db'), 1000, 1000))
+    service = FailingCalendarService(fail_after=2)
+    monkeypatch.setattr(export_cli, 'make_service', lambda student, latency: service)
+    student = {'studentId': 'B123', 'courses': [course(i) for i in range(4)]}
+
+    result = export_cli.export_student(student, '2025-09-08', '2026-01-09', False, 0.0, False)
+
+    assert 'rolled back 2 events' in result['error']
+    assert result['eventIds'] == []
+    assert service.calendars.get(export_cli.CALENDAR_ID, {}) == {}
+
+
+def test_weekend_meetings_are_reported():
+    time_ranges = {'1': '08:10 ~ 09:00', '2': '09:10 ~ 10:00'}
+    course_data = {
+        'time_codes': ['1', '2'],
+        'courses': [{
+            'code': 'CSE101',
+            'title': 'Programming',
+            'location': {'building': 'EC', 'room': '1001'},
+            'instructors': ['Lin'],
+            'times': [{'weekday': 2, 'index': 0}, {'weekday': 6, 'index': 1}],
+        }],
+    }
+
+    courses, skipped = export_cli.courses_from_course_data(course_data, time_ranges)
+
+    assert [c['day'] for c in courses] == ['Tuesday']
+    assert skipped == ['CSE101 Saturday']
@@ -0,0 +1,124 @@
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# The archived scraper's modules import each other by bare name
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'archive'))
+
+from http_fixtures import SCRUBBED, FixtureMissing, FixtureStore, RecordingSession, ReplaySession  # noqa: E402
+from selcrs_helper import SelcrsHelper  # noqa: E402
+
+STUDENT_ID = 'B093040001'
+PASSWORD = 'secret-password'
+# Big5, as selcrs serves it: department and name
+DEPARTMENT = '資工系'
+NAME = '王小明'
+USER_INFO_HTML = (
+    '<table><tr>'
+    f'<td>Department</td><td>{DEPARTMENT}</td>'
+    '<td>Class</td><td>CSE 3A</td>'
+    f'<td>Student id</td><td>{STUDENT_ID}</td>'
+    f'<td>Name</td><td>{NAME}</td>'
+    f'<td>E-mail</td><td>{STUDENT_ID.lower()}@student.nsysu.edu.tw</td>'
+    '</tr></table>'
+).encode('big5')
+
+
+class SelcrsHandler(BaseHTTPRequestHandler):
+    def _send(self, body):
+        # No charset, like selcrs: requests decodes the page as latin1
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        self._send(f'<p>Welcome {STUDENT_ID}</p>'.encode())
+
+    def do_GET(self):
+        if self.path == '/menu4/tools/changedat.asp':
+            self._send(USER_INFO_HTML)
+        else:
+            # Any other page (e.g. a catalog page) echoes the id in lower case
+            self._send(f'<p>Logged in as {STUDENT_ID.lower()}</p>'.encode())
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), SelcrsHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def make_helper(session_factory, server=None):
+    helper = SelcrsHelper(session_factory)
+    if server is not None:
+        helper.selcrs_url = f'http://127.0.0.1:{server.server_port}'
+    return helper
+
+
+def recorded_bodies(store):
+    bodies_dir = os.path.join(store.path, 'bodies')
+    return [store.body(name[:-len('.gz')]) for name in os.listdir(bodies_dir)]
+
+
+def test_record_then_replay_login_and_user_info(server, tmp_path):
+    store = FixtureStore(str(tmp_path / 'fixtures'))
+    helper = make_helper(lambda: RecordingSession(store), server)
+    assert helper.login(STUDENT_ID, PASSWORD).status_code == 200
+    assert helper.get_user_info().student_id == STUDENT_ID
+
+    for body in recorded_bodies(store):
+        assert STUDENT_ID.lower().encode() not in body.lower()
+        assert NAME.encode('big5') not in body
+        assert helper.base64md5(PASSWORD).encode() not in body
+    assert STUDENT_ID not in open(os.path.join(store.path, 'index.json'), encoding='utf-8').read()
+
+    # Credentials aren't part of the request key, so any account replays
+    replay = make_helper(lambda: ReplaySession(FixtureStore(store.path), latency=0))
+    assert replay.login('B000000000', 'other-password').status_code == 200
+    user_info = replay.get_user_info()
+    assert user_info.department == DEPARTMENT
+    assert user_info.student_id == SCRUBBED
+    assert user_info.name == SCRUBBED
+    assert user_info.email == SCRUBBED
+
+
+def test_sessions_on_one_store_share_scrub_values(server, tmp_path):
+    store = FixtureStore(str(tmp_path / 'fixtures'))
+    base_url = f'http://127.0.0.1:{server.server_port}'
+    RecordingSession(store).post(f'{base_url}/menu4/Studcheck_sso2.asp', data={'stuid': STUDENT_ID})
+
+    # Like the crawler's per-thread sessions, which only copy the login cookies
+    response = RecordingSession(store).get(f'{base_url}/catalog')
+
+    assert STUDENT_ID.lower() in response.text
+    for body in recorded_bodies(store):
+        assert STUDENT_ID.lower().encode() not in body.lower()
+
+
+def test_replay_without_fixture(tmp_path):
+    store = FixtureStore(str(tmp_path / 'empty'))
+    with pytest.raises(FixtureMissing):
+        ReplaySession(store, latency=0).get('http://selcrs.invalid/menu4/tools/changedat.asp')
+
+    failures = []
+
+    class Callback:
+        def on_failure(self, e):
+            failures.append(e)
+
+    helper = make_helper(lambda: ReplaySession(store, latency=0))
+    assert helper.get_user_info(Callback()) is None
+    assert len(failures) == 1 and isinstance(failures[0], FixtureMissing)
@@ -0,0 +1,28 @@
+from reminders import Reminder, ReminderScheduler
+
+
+def reminder(student_id, due):
+    return Reminder(due, student_id, 'course', 'Course', 'midterm', due + 3600)
+
+
+def test_rescheduled_reminders_replace_old_ones():
+    scheduler = ReminderScheduler()
+    scheduler.schedule([reminder('a', 100), reminder('a', 200), reminder('b', 150)], now=0)
+    scheduler.cancel_student('a')
+    scheduler.schedule([reminder('a', 300)], now=0)
+
+    assert [r.due for r in scheduler.pending('a')] == [300]
+    assert [r.due for r in scheduler.pop_due(now=1000)] == [150, 300]
+
+
+def test_bookkeeping_only_for_students_with_pending_reminders():
+    scheduler = ReminderScheduler()
+    for i in range(100):
+        scheduler.schedule([reminder(f's{i}', 100 + i)], now=0)
+    for i in range(50):
+        scheduler.cancel_student(f's{i}')
+    scheduler.deliver_due(lambda batch: None, now=1000)
+
+    assert len(scheduler) == 0
+    assert scheduler._generation == {}
+    assert scheduler._pending_count == {}
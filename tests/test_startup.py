@@ -0,0 +1,8 @@
+import check_startup
+
+
+def test_main_imports_lazily_and_within_budget():
+    timings = check_startup.measure_import()
+
+    assert [name for name in check_startup.LAZY_MODULES if name in timings] == []
+    assert timings['main'] / 1000 < check_startup.DEFAULT_BUDGET_MS
@@ -0,0 +1,109 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+import syllabus
+from syllabus import SyllabusCache, SyllabusFetcher, parse_weekly_topics
+
+SYLLABUS_HTML = '''
+<html><body><table>
+  <tr><th>Week</th><th>Date</th><th>Topic</th></tr>
+  <tr><td>1</td><td>09/08</td><td>Introduction</td></tr>
+  <tr><td>Week 2</td><td>2025/09/15 (一)</td><td>Control   flow</td></tr>
+  <tr><td>第3週</td><td>Recursion</td></tr>
+  <tr><td>3</td><td>Duplicate week is ignored</td></tr>
+  <tr><td>Office hours</td><td>Tuesday</td></tr>
+</table></body></html>
+'''
+
+
+class SyllabusHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        code = parse_qs(urlsplit(self.path).query)['CRSNO'][0]
+        with self.server.lock:
+            self.server.hits[code] = self.server.hits.get(code, 0) + 1
+        # Slow enough that concurrent callers overlap with the download
+        time.sleep(0.2)
+        # Course codes starting with DOWN stand for a syllabus site that errors
+        if code.startswith('DOWN'):
+            self.send_error(500)
+            return
+        body = SYLLABUS_HTML.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), SyllabusHandler)
+    httpd.hits = {}
+    httpd.lock = threading.Lock()
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def make_fetcher(server, tmp_path):
+    return SyllabusFetcher(base_url=f'http://127.0.0.1:{server.server_port}',
+                           cache=SyllabusCache(str(tmp_path / 'syllabus.db')))
+
+
+def test_parse_weekly_topics():
+    assert parse_weekly_topics(SYLLABUS_HTML) == [
+        (1, 'Introduction'),
+        (2, 'Control flow'),
+        (3, 'Recursion'),
+    ]
+
+
+def test_concurrent_callers_share_one_download(server, tmp_path):
+    fetcher = make_fetcher(server, tmp_path)
+    results = []
+
+    def worker():
+        results.append(fetcher.topics_for(['CSE101', 'CSE102', 'CSE101'], '1141'))
+
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert server.hits == {'CSE101': 1, 'CSE102': 1}
+    assert len(results) == 6
+    assert all(result == results[0] for result in results)
+    assert results[0]['CSE101'][0] == (1, 'Introduction')
+
+
+def test_cached_syllabi_are_reused(server, tmp_path):
+    make_fetcher(server, tmp_path).topics_for(['CSE101'], '1141')
+
+    # A new fetcher (e.g. another worker process) reads the shared cache file
+    topics = make_fetcher(server, tmp_path).topics_for(['CSE101'], '1141')
+
+    assert server.hits == {'CSE101': 1}
+    assert topics['CSE101'][2] == (3, 'Recursion')
+
+
+def test_failed_downloads_are_cached_briefly(server, tmp_path, monkeypatch):
+    fetcher = make_fetcher(server, tmp_path)
+    for _ in range(5):
+        assert fetcher.topics_for(['DOWN101', 'CSE101'], '1141').keys() == {'CSE101'}
+    assert make_fetcher(server, tmp_path).topics_for(['DOWN101'], '1141') == {}
+    assert server.hits == {'DOWN101': 1, 'CSE101': 1}
+
+    # Once the failure expires the course is downloaded again
+    monkeypatch.setattr(syllabus, 'FAILED_CACHE_TTL', 0)
+    make_fetcher(server, tmp_path).topics_for(['DOWN101', 'CSE101'], '1141')
+    assert server.hits == {'DOWN101': 2, 'CSE101': 1}
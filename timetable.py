@@ -0,0 +1,86 @@
+import hashlib
+import json
+import threading
+
+from calendar_events import DAY_MAPPING
+
+DAYS = sorted(DAY_MAPPING, key=DAY_MAPPING.get)
+
+
+def build_timetable(courses, time_ranges):
+    """Dense period x weekday grid of the saved courses.
+
+    `cells[row][col]` is None for a free slot, otherwise the course id and
+    color. The first cell of each run of consecutive periods carries the
+    run's length as `span`; the cells it covers have span 0. Course details
+    are listed once under `courses`. If two courses claim a slot, the one
+    saved first keeps it.
+    """
+    rows = {time_range: row for row, time_range in enumerate(time_ranges.values())}
+    cells = [[None] * len(DAYS) for _ in rows]
+    details = {}
+
+    for course in courses:
+        col = DAY_MAPPING.get(course['day'])
+        if col is None:
+            continue
+        course_rows = sorted({rows[time_range] for time_range in course['timeRange'] if time_range in rows})
+        course_id = course['added_at']
+        start = None
+        for i, row in enumerate(course_rows):
+            if cells[row][col] is not None:
+                start = None
+                continue
+            if start is None or course_rows[i - 1] != row - 1:
+                start = {'courseId': course_id, 'color': course.get('color'), 'span': 0}
+                cells[row][col] = start
+            else:
+                cells[row][col] = {'courseId': course_id, 'color': course.get('color'), 'span': 0}
+            start['span'] += 1
+        details[course_id] = {
+            'courseName': course['courseName'],
+            'location': course['location'],
+            'instructor': course.get('instructor', ''),
+            'day': course['day'],
+        }
+
+    return {
+        'days': DAYS,
+        'periods': [{'period': period, 'timeRange': time_range} for period, time_range in time_ranges.items()],
+        'cells': cells,
+        'courses': details,
+    }
+
+
+class TimetableCache:
+    """Serialized timetable, rebuilt only after the courses change.
+
+    Writers call `invalidate()` after every save, update or delete; the
+    version counter makes a rebuild that raced with a write get discarded
+    instead of cached. The ETag is a hash of the body, so it stays valid
+    across restarts and never repeats for a different timetable.
+    """
+
+    def __init__(self, time_ranges):
+        self.time_ranges = time_ranges
+        self.version = 0
+        self._cached = None
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        with self._lock:
+            self.version += 1
+            self._cached = None
+
+    def get(self, courses):
+        """(ETag, JSON body) for the current course list."""
+        cached = self._cached
+        if cached is not None:
+            return cached
+        version = self.version
+        body = json.dumps(build_timetable(list(courses), self.time_ranges), ensure_ascii=False)
+        etag = f'"timetable-{hashlib.sha256(body.encode()).hexdigest()[:16]}"'
+        with self._lock:
+            if version == self.version:
+                self._cached = (etag, body)
+        return etag, body
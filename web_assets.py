@@ -0,0 +1,150 @@
+import gzip
+import hashlib
+import os
+
+from flask import Response, render_template, request
+
+# Static files and pages are read, rendered and compressed once at startup.
+# Assets are served under content-hashed URLs that never change meaning, so
+# browsers may cache them forever; pages carry an ETag and are revalidated.
+# Compressed bodies get weak ETags: a strong one must differ per content-coding.
+# Brotli is used when the optional `brotli` package is installed.
+
+ASSET_PREFIX = '/assets/'
+IMMUTABLE = 'public, max-age=31536000, immutable'
+# JSON bodies smaller than this aren't worth the CPU
+JSON_COMPRESS_MIN_SIZE = 1024
+# Keep a compressed variant only if it saves at least this fraction
+MIN_SAVING = 0.1
+
+MIME_TYPES = {
+    '.ico': 'image/x-icon',
+    '.png': 'image/png',
+    '.css': 'text/css; charset=utf-8',
+    '.js': 'text/javascript; charset=utf-8',
+    '.svg': 'image/svg+xml',
+}
+
+
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def compressed_variants(body):
+    """{encoding: bytes} for the identity body and every encoding that pays off."""
+    variants = {'identity': body}
+    candidates = [('gzip', gzip.compress(body, compresslevel=9, mtime=0))]
+    brotli = _brotli()
+    if brotli is not None:
+        candidates.append(('br', brotli.compress(body)))
+    for encoding, compressed in candidates:
+        if len(compressed) <= len(body) * (1 - MIN_SAVING):
+            variants[encoding] = compressed
+    return variants
+
+
+def pick_encoding(variants):
+    for encoding in ('br', 'gzip'):
+        if encoding in variants and request.accept_encodings[encoding]:
+            return encoding
+    return 'identity'
+
+
+def weak_etag(etag):
+    return etag if etag.startswith('W/') else f'W/{etag}'
+
+
+def etag_matches(etag):
+    """Weak comparison against If-None-Match, as RFC 9110 asks for GET."""
+    return etag.removeprefix('W/') in request.headers.get('If-None-Match', '')
+
+
+def variant_response(variants, mimetype, etag, cache_control):
+    encoding = pick_encoding(variants)
+    if encoding != 'identity':
+        etag = weak_etag(etag)
+    if etag_matches(etag):
+        response = Response(status=304)
+    else:
+        response = Response(variants[encoding], mimetype=mimetype)
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+    response.headers['ETag'] = etag
+    response.headers['Cache-Control'] = cache_control
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+
+class AssetBundle:
+    """Fingerprinted, precompressed copies of everything in the static folder."""
+
+    def __init__(self, static_dir):
+        self.urls = {}
+        self.files = {}
+        for name in sorted(os.listdir(static_dir)):
+            path = os.path.join(static_dir, name)
+            if not os.path.isfile(path):
+                continue
+            with open(path, 'rb') as f:
+                body = f.read()
+            digest = hashlib.sha256(body).hexdigest()[:12]
+            stem, ext = os.path.splitext(name)
+            hashed = f'{stem}.{digest}{ext}'
+            self.urls[name] = ASSET_PREFIX + hashed
+            self.files[hashed] = (compressed_variants(body), MIME_TYPES.get(ext, 'application/octet-stream'), digest)
+
+    def url(self, name):
+        """Hashed URL for a static file; unknown names fall back to /static."""
+        return self.urls.get(name, f'/static/{name}')
+
+    def response(self, hashed):
+        if hashed not in self.files:
+            return None
+        variants, mimetype, digest = self.files[hashed]
+        return variant_response(variants, mimetype, f'"{digest}"', IMMUTABLE)
+
+
+class PageCache:
+    """Templates rendered once; they take no per-request context.
+
+    In debug mode pages are rendered on every request so template edits
+    show up without a restart.
+    """
+
+    def __init__(self, app, names):
+        self.app = app
+        self.names = names
+        self.pages = {}
+
+    def prerender(self):
+        with self.app.app_context():
+            for name in self.names:
+                body = render_template(name).encode('utf-8')
+                self.pages[name] = (compressed_variants(body), f'"{hashlib.sha256(body).hexdigest()[:16]}"')
+
+    def response(self, name):
+        if self.app.debug or name not in self.pages:
+            return render_template(name)
+        variants, etag = self.pages[name]
+        return variant_response(variants, 'text/html', etag, 'no-cache')
+
+
+def compress_json(response):
+    """after_request hook: gzip JSON API responses above JSON_COMPRESS_MIN_SIZE."""
+    if (response.mimetype != 'application/json' or response.status_code != 200
+            or response.direct_passthrough or 'Content-Encoding' in response.headers
+            or not request.accept_encodings['gzip']):
+        return response
+    body = response.get_data()
+    if len(body) < JSON_COMPRESS_MIN_SIZE:
+        return response
+    response.set_data(gzip.compress(body, compresslevel=6))
+    response.headers['Content-Encoding'] = 'gzip'
+    if 'ETag' in response.headers:
+        response.headers['ETag'] = weak_etag(response.headers['ETag'])
+    response.vary.add('Accept-Encoding')
+    return response